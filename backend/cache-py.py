@@ -0,0 +1,231 @@
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .compression import precompress
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 15)
+# How long an expired entry may still be served while one worker rebuilds it
+RESPONSE_CACHE_STALE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_STALE_TIMEOUT', 60)
+# Spread expiry of entries written together by +/- this fraction of the timeout
+RESPONSE_CACHE_JITTER = getattr(settings, 'RESPONSE_CACHE_JITTER', 0.1)
+# How long a request waits for another worker to rebuild a missing entry
+RESPONSE_CACHE_COALESCE_WAIT = getattr(settings, 'RESPONSE_CACHE_COALESCE_WAIT', 2.0)
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+RESPONSE_CACHE_LOCK_TIMEOUT = 30
+
+STAT_NAMES = ('hits', 'misses', 'coalesced', 'stale')
+
+
+def cache_scope(user):
+    """Return the permission scope a cached response may be shared within."""
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.user_type == 'instructor':
+        # Instructors also see their own unpublished courses
+        return f'instructor:{user.pk}'
+    if user.user_type == 'admin':
+        return 'admin'
+    return 'student'
+
+
+def response_cache_key(request):
+    url = request.build_absolute_uri()
+    digest = hashlib.md5(url.encode('utf-8')).hexdigest()
+    return f'resp:{cache_scope(request.user)}:{digest}'
+
+
+def course_tags(course_id):
+    """Tags for a change that shows on the course's detail page and in course lists."""
+    return ['courses', f'course:{course_id}']
+
+
+def course_detail_tags(course_id):
+    """Tags for a change that only shows on the course's detail page."""
+    return [f'course:{course_id}']
+
+
+def category_tags(category_id):
+    return [f'category:{category_id}']
+
+
+def _tag_key(tag):
+    return f'resptag:{tag}'
+
+
+def _fresh_version():
+    # Seed counters from the clock so an evicted tag never reuses an old version
+    return int(time.time() * 1000)
+
+
+def get_tag_versions(tags):
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_version(), None)
+            found[key] = cache.get(key)
+
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def invalidate_tags(tags):
+    """Drop every cached response tagged with any of ``tags`` once the transaction commits."""
+    def bump():
+        for tag in tags:
+            key = _tag_key(tag)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _fresh_version(), None)
+
+    transaction.on_commit(bump)
+
+
+def record_stat(name):
+    key = f'respstats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def response_cache_stats():
+    found = cache.get_many([f'respstats:{name}' for name in STAT_NAMES])
+    return {name: found.get(f'respstats:{name}', 0) for name in STAT_NAMES}
+
+
+def get_cached_response(key):
+    entry = cache.get(key)
+    if entry is None:
+        return None
+
+    if get_tag_versions(entry['tags']) != entry['tags']:
+        return None
+
+    return entry
+
+
+def set_cached_response(key, tag_versions, response, body=None, media_type=None, timeout=RESPONSE_CACHE_TIMEOUT):
+    """
+    Store ``response`` under ``key``.
+
+    ``body`` is the response rendered for ``media_type``; it is stored along
+    with its compressed encodings so hits skip rendering and compression.
+    """
+    timeout *= random.uniform(1 - RESPONSE_CACHE_JITTER, 1 + RESPONSE_CACHE_JITTER)
+    entry = {
+        'tags': tag_versions,
+        'status': response.status_code,
+        'data': response.data,
+        'body': body,
+        'media_type': media_type,
+        'encodings': precompress(body) if body is not None else {},
+        'fresh_until': time.time() + timeout,
+    }
+    cache.set(key, entry, int(timeout + RESPONSE_CACHE_STALE_TIMEOUT))
+    return entry
+
+
+def _is_fresh(entry):
+    return entry['fresh_until'] > time.time()
+
+
+def _wait_for_rebuild(key):
+    deadline = time.monotonic() + RESPONSE_CACHE_COALESCE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+        entry = get_cached_response(key)
+        if entry is not None and _is_fresh(entry):
+            return entry
+    return None
+
+
+class CachedResponseMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the response cache.
+
+    Entries are keyed by URL and permission scope and tagged with the rows
+    they were built from, see ``get_cache_tags``. Only one worker rebuilds an
+    expired or missing entry at a time; the others serve the stale copy or
+    wait briefly for the rebuilt one.
+    """
+
+    def get_cache_tags(self):
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache_key(request)
+        entry = get_cached_response(key)
+        if entry is not None and _is_fresh(entry):
+            record_stat('hits')
+            return self._cached_entry_response(request, entry)
+
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, RESPONSE_CACHE_LOCK_TIMEOUT):
+            if entry is not None:
+                record_stat('stale')
+                return self._cached_entry_response(request, entry)
+
+            entry = _wait_for_rebuild(key)
+            if entry is not None:
+                record_stat('coalesced')
+                return self._cached_entry_response(request, entry)
+
+            # The rebuilding worker is too slow, build it ourselves without the lock
+            lock_key = None
+
+        record_stat('misses')
+        try:
+            return self._build_response(key, handler, request, *args, **kwargs)
+        finally:
+            if lock_key is not None:
+                cache.delete(lock_key)
+
+    def _build_response(self, key, handler, request, *args, **kwargs):
+        # Read tag versions before building so a concurrent write invalidates this entry
+        tag_versions = get_tag_versions(self.get_cache_tags())
+        response = handler(request, *args, **kwargs)
+
+        if response.status_code == 200:
+            body = None
+            # Only JSON bodies are stored; the browsable API renders from the data
+            if request.accepted_renderer.format == 'json':
+                body = request.accepted_renderer.render(
+                    response.data, request.accepted_media_type, self.get_renderer_context()
+                )
+            entry = set_cached_response(key, tag_versions, response, body, request.accepted_media_type)
+            return self._cached_entry_response(request, entry)
+
+        return response
+
+    def _cached_entry_response(self, request, entry):
+        """Serve the stored body as is when the request negotiated the same media type."""
+        if entry.get('body') is None or entry['media_type'] != request.accepted_media_type:
+            return Response(entry['data'], status=entry['status'])
+
+        response = HttpResponse(entry['body'], status=entry['status'], content_type=entry['media_type'])
+        response.precompressed = entry['encodings']
+        return response
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache_stats())
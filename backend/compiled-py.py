@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+
+VALUE = 'value'
+NESTED = 'nested'
+PROPERTY = 'property'
+
+
+class NotCompilable(Exception):
+    pass
+
+
+class CompiledSerializer:
+    """
+    Read-only rendering plan for a ``ModelSerializer``, fed by ``.values()`` rows.
+
+    The serializer is instantiated once and its bound fields are walked into a
+    flat list of ``.values()`` columns plus one step per output field. Each
+    step reuses the DRF field's own ``to_representation``, so the output is
+    identical to the serializer's, without building serializers or model
+    instances per row.
+
+    Supported fields are model fields, primary key relations, nested
+    single-object serializers and model properties listed in the serializer's
+    ``compiled_dependencies`` with the fields they read. Anything else raises
+    ``NotCompilable``.
+    """
+
+    def __init__(self, serializer):
+        self.columns = []
+        self.plan = self._compile(serializer, serializer.Meta.model, '')
+
+    def _column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return path
+
+    def _compile(self, serializer, model, prefix):
+        dependencies = getattr(serializer, 'compiled_dependencies', {})
+        plan = []
+        for field in serializer._readable_fields:
+            source = field.source
+            if source == '*' or '.' in source:
+                raise NotCompilable(f'{field.field_name} has a dotted source')
+
+            path = prefix + source
+            if isinstance(field, serializers.ListSerializer):
+                raise NotCompilable(f'{field.field_name} is a to-many relation')
+
+            if isinstance(field, serializers.BaseSerializer):
+                related_model = self._model_field(model, source).related_model
+                pk_column = self._column(f'{path}__{related_model._meta.pk.name}')
+                plan.append((NESTED, field.field_name, pk_column, self._compile(field, related_model, path + '__')))
+            elif isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                plan.append((VALUE, field.field_name, self._column(path), None))
+            elif isinstance(field, (relations.RelatedField, relations.ManyRelatedField, serializers.SerializerMethodField)):
+                raise NotCompilable(f'{field.field_name} cannot be read from a column')
+            elif source in dependencies:
+                columns = [(name, self._column(prefix + name)) for name in dependencies[source]]
+                plan.append((PROPERTY, field.field_name, columns, (getattr(model, source).fget, field.to_representation)))
+            else:
+                model_field = self._model_field(model, source)
+                if model_field.is_relation:
+                    raise NotCompilable(f'{field.field_name} renders a related object')
+                plan.append((VALUE, field.field_name, self._column(path), self._converter(field, model_field)))
+        return plan
+
+    def _model_field(self, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotCompilable(f'{model.__name__}.{name} is not a model field')
+
+    def _converter(self, field, model_field):
+        if isinstance(model_field, models.FileField):
+            # .values() returns the stored name; wrap it the way model instances do
+            return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+        return field.to_representation
+
+    def values(self, queryset, *extra_columns):
+        """``queryset`` as ``.values()`` dicts holding every column the plan reads."""
+        return queryset.values(*self.columns, *[column for column in extra_columns if column not in self.columns])
+
+    def _render(self, plan, row):
+        data = {}
+        for kind, name, column, convert in plan:
+            if kind is VALUE:
+                value = row[column]
+                data[name] = value if value is None or convert is None else convert(value)
+            elif kind is NESTED:
+                data[name] = None if row[column] is None else self._render(convert, row)
+            else:
+                fget, convert = convert
+                value = fget(SimpleNamespace(**{attname: row[path] for attname, path in column}))
+                data[name] = None if value is None else convert(value)
+        return data
+
+    def render(self, row):
+        return self._render(self.plan, row)
+
+    def render_many(self, rows):
+        return [self._render(self.plan, row) for row in rows]
+
+
+def compile_serializer(serializer_class, context=None):
+    """Compile ``serializer_class`` for this request, or return ``None`` if it is not supported."""
+    try:
+        return CompiledSerializer(serializer_class(context=context or {}))
+    except NotCompilable:
+        return None
+
+
+class CompiledListMixin:
+    """
+    Render ``list`` through a ``CompiledSerializer`` instead of the serializer.
+
+    Falls back to the regular serializer whenever the serializer class, as
+    trimmed by ``?fields=``/``?expand=``, cannot be compiled.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class(), self.get_serializer_context())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        # Cursor pagination reads the ordering fields off each row
+        ordering = [field.lstrip('-') for field in getattr(self, 'cursor_ordering', ())]
+        queryset = compiled.values(self.filter_queryset(self.get_queryset()), *ordering)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.render_many(page))
+        return Response(compiled.render_many(queryset))
@@ -0,0 +1,137 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this go out uncompressed
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+COMPRESSION_GZIP_LEVEL = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+COMPRESSION_BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def available_encodings():
+    """Supported content codings, most preferred first."""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def precompress(body):
+    """Every available encoding of ``body``, or none if it is below the size threshold."""
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return {}
+    return {encoding: compress(body, encoding) for encoding in available_encodings()}
+
+
+def tag_etag(etag, encoding):
+    """The strong ``etag`` of a body sent with ``encoding``; each coding is its own representation."""
+    if etag.startswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def untag_etag(etag):
+    """``etag`` without the coding suffix ``tag_etag`` adds."""
+    for encoding in ('br', 'gzip'):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def negotiate_encoding(accept_encoding, encodings):
+    """The first of ``encodings`` the ``Accept-Encoding`` header allows, or ``None``."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            accepted[coding.strip().lower()] = quality
+
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress API responses with brotli or gzip, as negotiated.
+
+    Responses carrying a ``precompressed`` dict of encoded bodies, such as
+    response cache hits, are served from it instead of compressing again.
+    Streaming responses are gzipped on the fly. Strong ETags of compressed
+    bodies get the coding appended, e.g. ``"abc-gzip"``.
+    """
+
+    def process_response(self, request, response):
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+        if response.status_code == 304:
+            self._echo_etag(request, response)
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            encoding = negotiate_encoding(accept_encoding, ('gzip',))
+            if encoding is None:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response['Content-Length']
+            response['Content-Encoding'] = encoding
+            return response
+
+        encoding = negotiate_encoding(accept_encoding, available_encodings())
+        if encoding is None:
+            return response
+
+        body = (getattr(response, 'precompressed', None) or {}).get(encoding)
+        if body is None:
+            if len(response.content) < COMPRESSION_MIN_SIZE:
+                return response
+            body = compress(response.content, encoding)
+            if len(body) >= len(response.content):
+                return response
+
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = tag_etag(response['ETag'], encoding)
+        return response
+
+    def _echo_etag(self, request, response):
+        # A 304 must carry the ETag of the representation the client holds, coding included
+        etag = response.get('ETag')
+        if not etag:
+            return
+        for candidate in request.META.get('HTTP_IF_NONE_MATCH', '').split(','):
+            candidate = candidate.strip()
+            if untag_etag(candidate.removeprefix('W/')) == etag:
+                response['ETag'] = candidate.removeprefix('W/')
+                return
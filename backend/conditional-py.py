@@ -0,0 +1,80 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from .compression import untag_etag
+
+
+def make_etag(*parts):
+    """Strong ETag over the ``repr`` of ``parts``."""
+    return '"%s"' % hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _normalize_etag(etag):
+    etag = etag.strip()
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    # Compressed responses carry their coding as an ETag suffix
+    return untag_etag(etag)
+
+
+def etag_matches(if_none_match, etag):
+    if if_none_match.strip() == '*':
+        return True
+    return any(_normalize_etag(candidate) == etag for candidate in if_none_match.split(','))
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` and ``If-Modified-Since`` on ``list`` and ``retrieve``.
+
+    ``get_validators`` returns ``(state, last_modified)`` for the current
+    request, read with a single indexed lookup, or ``None`` to skip
+    conditional handling. ``state`` must change whenever the response body
+    would; ``last_modified`` may be ``None`` when no timestamp covers all of
+    it. A match returns 304 before the response cache or any serializer runs.
+    """
+
+    def get_validators(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        state, last_modified = validators
+        # The same state renders differently per query string and media type
+        etag = make_etag(state, request.get_full_path(), request.accepted_media_type)
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        else:
+            not_modified = (
+                last_modified is not None and if_modified_since is not None
+                and int(last_modified.timestamp()) <= if_modified_since
+            )
+
+        if not_modified:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Let clients keep a copy but always revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
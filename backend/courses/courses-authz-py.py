@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from lms_project.transactions import on_commit_once
+from .models import Course, Enrollment, Lesson
+
+AUTHZ_CACHE_TIMEOUT = 60 * 15
+
+class AuthorizationContext:
+    """The course ids a user is actively enrolled in and teaches."""
+    
+    def __init__(self, enrolled_course_ids=frozenset(), taught_course_ids=frozenset()):
+        self.enrolled_course_ids = enrolled_course_ids
+        self.taught_course_ids = taught_course_ids
+    
+    def teaches(self, course_id):
+        return course_id in self.taught_course_ids
+    
+    def is_enrolled(self, course_id):
+        return course_id in self.enrolled_course_ids
+
+def _cache_key(user_id):
+    return f'authz:{user_id}'
+
+def load_authorization(user):
+    if not user or not user.is_authenticated:
+        return AuthorizationContext()
+    
+    course_ids = cache.get(_cache_key(user.pk))
+    if course_ids is None:
+        course_ids = (
+            frozenset(Enrollment.objects.filter(user=user, status='active').values_list('course_id', flat=True)),
+            frozenset(Course.objects.filter(instructor=user).values_list('pk', flat=True)),
+        )
+        cache.set(_cache_key(user.pk), course_ids, AUTHZ_CACHE_TIMEOUT)
+    return AuthorizationContext(*course_ids)
+
+def get_authorization(request):
+    """Load the caller's authorization context once per request."""
+    context = getattr(request, '_authorization', None)
+    if context is None:
+        context = load_authorization(request.user)
+        request._authorization = context
+    return context
+
+def _delete_authorization(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+def invalidate_authorization(*user_ids):
+    """Drop the cached contexts of ``user_ids`` once, after the current transaction commits."""
+    on_commit_once('authorization', user_ids, _delete_authorization)
+
+def course_id_for(obj):
+    """The id of the course an object belongs to, without walking lazy relations."""
+    if isinstance(obj, Course):
+        return obj.pk
+    
+    # Quizzes and attempts carry a denormalized course_id as well
+    if hasattr(obj, 'course_id'):
+        return obj.course_id
+    
+    if hasattr(obj, 'section_id'):
+        # LessonViewSet selects the section along with the lesson
+        if Lesson.section.is_cached(obj):
+            return obj.section.course_id
+        return Lesson.objects.filter(pk=obj.pk).values_list('section__course_id', flat=True).first()
+    
+    if hasattr(obj, 'lesson_id'):
+        return Lesson.objects.filter(pk=obj.lesson_id).values_list('section__course_id', flat=True).first()
+    
+    return None
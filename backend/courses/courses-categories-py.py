@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from .models import Category, Course
+
+TREE_CACHE_KEY = 'category-tree'
+TREE_CACHE_TIMEOUT = 60 * 60
+
+def build_category_tree():
+    """Nested category tree with direct and subtree published course counts."""
+    direct_counts = dict(
+        Course.objects.filter(is_published=True).order_by()
+        .values('category_id').annotate(n=Count('id'))
+        .values_list('category_id', 'n')
+    )
+    
+    nodes = {}
+    roots = []
+    # Ordering by path visits every parent before its children
+    for category in Category.objects.order_by('path').values('id', 'name', 'description', 'parent_id', 'path'):
+        node = {
+            'id': category['id'],
+            'name': category['name'],
+            'description': category['description'],
+            'parent': category['parent_id'],
+            'course_count': direct_counts.get(category['id'], 0),
+            'total_course_count': 0,
+            'children': [],
+        }
+        nodes[category['id']] = (node, category['path'])
+        
+        parent = nodes.get(category['parent_id'])
+        if parent:
+            parent[0]['children'].append(node)
+        else:
+            roots.append(node)
+    
+    for node, path in nodes.values():
+        for ancestor_id in path.split('/')[:-1]:
+            ancestor = nodes.get(int(ancestor_id))
+            if ancestor:
+                ancestor[0]['total_course_count'] += node['course_count']
+    
+    return roots
+
+def get_category_tree():
+    tree = cache.get(TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(TREE_CACHE_KEY, tree, TREE_CACHE_TIMEOUT)
+    return tree
+
+def invalidate_category_tree():
+    transaction.on_commit(lambda: cache.delete(TREE_CACHE_KEY))
+
+def subtree_path(category_id):
+    return Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+
+def rebuild_category_paths():
+    """Recompute every materialized path from the parent links."""
+    categories = {
+        category.pk: category
+        for category in Category.objects.only('id', 'parent_id', 'path', 'depth')
+    }
+    
+    def path_of(category, seen=()):
+        if category.parent_id is None or category.parent_id not in categories or category.pk in seen:
+            return f'{category.pk}/'
+        return path_of(categories[category.parent_id], seen + (category.pk,)) + f'{category.pk}/'
+    
+    for category in categories.values():
+        category.path = path_of(category)
+        category.depth = category.path.count('/') - 1
+    
+    Category.objects.bulk_update(categories.values(), ['path', 'depth'], batch_size=1000)
+    invalidate_category_tree()
+    return len(categories)
@@ -0,0 +1,116 @@
+import csv
+import io
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+from lms_project.cache import course_tags, invalidate_tags
+from .models import Enrollment, Lesson
+from .authz import invalidate_authorization
+from .stats import rebuild_course_stats
+
+User = get_user_model()
+
+COHORT_CHUNK_SIZE = 1000
+HEADER_CELLS = {'id', 'user', 'user_id', 'email'}
+
+def read_identifiers(upload):
+    """First column of every row of an uploaded CSV file, minus an optional header row."""
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig')
+    identifiers = [row[0].strip() for row in csv.reader(text) if row and row[0].strip()]
+    if identifiers and identifiers[0].lower() in HEADER_CELLS:
+        identifiers = identifiers[1:]
+    return identifiers
+
+def resolve_users(identifiers):
+    """
+    Map each identifier to a user id, or ``None`` if it matches no user.
+
+    Identifiers are user ids or emails; emails match case-insensitively. Both
+    kinds are resolved with one query each per chunk.
+    """
+    ids = set()
+    emails = set()
+    for identifier in identifiers:
+        value = str(identifier).strip()
+        if value.isdigit():
+            ids.add(int(value))
+        elif '@' in value:
+            emails.add(value.lower())
+
+    resolved = {}
+    ids = list(ids)
+    for start in range(0, len(ids), COHORT_CHUNK_SIZE):
+        for pk in User.objects.filter(pk__in=ids[start:start + COHORT_CHUNK_SIZE]).values_list('pk', flat=True):
+            resolved[str(pk)] = pk
+    emails = list(emails)
+    for start in range(0, len(emails), COHORT_CHUNK_SIZE):
+        for pk, email in (
+            User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=emails[start:start + COHORT_CHUNK_SIZE])
+            .values_list('pk', 'email_lower')
+        ):
+            resolved[email] = pk
+
+    def lookup(identifier):
+        value = str(identifier).strip()
+        return resolved.get(str(int(value)) if value.isdigit() else value.lower())
+
+    return [(identifier, lookup(identifier)) for identifier in identifiers]
+
+def enroll_cohort(course_id, identifiers, chunk_size=COHORT_CHUNK_SIZE):
+    """
+    Enroll every user named in ``identifiers`` in a course.
+
+    Returns ``(summary, results)`` where ``results`` holds one
+    ``{'identifier', 'user', 'status'}`` entry per identifier, with status
+    ``enrolled``, ``already_enrolled``, ``duplicate`` or ``not_found``.
+
+    Enrollments are inserted with ``bulk_create``, so the per-enrollment signal
+    handlers do not run; the course counters, cached responses and
+    authorization contexts they would have touched are refreshed once here.
+    """
+    results = []
+    user_ids = []
+    seen = set()
+    for identifier, user_id in resolve_users(identifiers):
+        if user_id is None:
+            status = 'not_found'
+        elif user_id in seen:
+            status = 'duplicate'
+        else:
+            status = 'enrolled'
+            seen.add(user_id)
+            user_ids.append(user_id)
+        results.append({'identifier': identifier, 'user': user_id, 'status': status})
+
+    total_lessons = Lesson.objects.filter(section__course_id=course_id).count()
+    already_enrolled = set()
+    enrolled = []
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        with transaction.atomic():
+            existing = set(
+                Enrollment.objects.filter(course_id=course_id, user_id__in=chunk).values_list('user_id', flat=True)
+            )
+            # The unique (user, course) constraint absorbs enrollments that race with this one
+            Enrollment.objects.bulk_create([
+                Enrollment(user_id=user_id, course_id=course_id, status='active', total_lessons=total_lessons)
+                for user_id in chunk if user_id not in existing
+            ], ignore_conflicts=True)
+        already_enrolled |= existing
+        enrolled += [user_id for user_id in chunk if user_id not in existing]
+
+    if enrolled:
+        rebuild_course_stats([course_id])
+        invalidate_authorization(*enrolled)
+        invalidate_tags(course_tags(course_id))
+
+    for result in results:
+        if result['status'] == 'enrolled' and result['user'] in already_enrolled:
+            result['status'] = 'already_enrolled'
+
+    summary = {'enrolled': 0, 'already_enrolled': 0, 'duplicate': 0, 'not_found': 0}
+    for result in results:
+        summary[result['status']] += 1
+    return summary, results
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from .models import Section, Lesson, LessonProgress
+
+CURRICULUM_CACHE_TIMEOUT = 60 * 60 * 24
+
+def _cache_key(course_id, version):
+    return f'curriculum:{course_id}:{version}'
+
+def build_curriculum(course_id, version):
+    """Ordered sections and lessons of a course, with section and course durations."""
+    sections = []
+    by_id = {}
+    for section in Section.objects.filter(course_id=course_id).order_by('order', 'id').values(
+        'id', 'title', 'description', 'order'
+    ):
+        section.update(duration=0, lessons=[])
+        sections.append(section)
+        by_id[section['id']] = section
+
+    for lesson in Lesson.objects.filter(section__course_id=course_id).order_by('order', 'id').values(
+        'id', 'section_id', 'title', 'lesson_type', 'order', 'duration', 'quiz_id'
+    ):
+        section = by_id[lesson.pop('section_id')]
+        lesson['quiz'] = lesson.pop('quiz_id')
+        section['lessons'].append(lesson)
+        section['duration'] += lesson['duration']
+
+    return {
+        'course': course_id,
+        'version': version,
+        'lesson_count': sum(len(section['lessons']) for section in sections),
+        'total_duration': sum(section['duration'] for section in sections),
+        'sections': sections,
+    }
+
+def get_curriculum(course):
+    """
+    The curriculum snapshot of ``course`` from the shared cache.
+
+    Snapshots are keyed by ``Course.curriculum_version``, which every section
+    and lesson change bumps, so a snapshot is rebuilt on the first read after
+    a change and never invalidated explicitly.
+    """
+    key = _cache_key(course.pk, course.curriculum_version)
+    curriculum = cache.get(key)
+    if curriculum is None:
+        curriculum = build_curriculum(course.pk, course.curriculum_version)
+        cache.set(key, curriculum, CURRICULUM_CACHE_TIMEOUT)
+    return curriculum
+
+def get_learner_curriculum(course, user):
+    """The curriculum snapshot with ``user``'s completed lessons marked, in one progress query."""
+    # Cache reads hand back a private copy, so the snapshot can be marked in place
+    curriculum = get_curriculum(course)
+
+    completed = set()
+    if user.is_authenticated:
+        completed = set(LessonProgress.objects.filter(
+            enrollment__user=user, enrollment__course_id=course.pk, is_completed=True
+        ).values_list('lesson_id', flat=True))
+
+    bitmap = []
+    for section in curriculum['sections']:
+        for lesson in section['lessons']:
+            lesson['is_completed'] = lesson['id'] in completed
+            bitmap.append('1' if lesson['is_completed'] else '0')
+
+    curriculum['completed_lessons'] = bitmap.count('1')
+    # One character per lesson in curriculum order, for players that track completion compactly
+    curriculum['completion_bitmap'] = ''.join(bitmap)
+    return curriculum
@@ -0,0 +1,102 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from quizzes.models import Quiz, QuizAttempt
+from .models import Enrollment
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+GRADEBOOK_CHUNK_SIZE = 2000
+
+ENROLLMENT_COLUMNS = [
+    'user_id', 'email', 'first_name', 'last_name', 'status',
+    'progress', 'completed_lessons', 'total_lessons', 'enrolled_at', 'completed_at',
+]
+
+class Echo:
+    """File-like object that hands back what is written, for streaming ``csv.writer`` output."""
+
+    def write(self, value):
+        return value
+
+def _quiz_scores(attempts):
+    """Best and latest score per quiz from one student's attempts, oldest first."""
+    scores = {}
+    for _, quiz_id, score, completed_at in attempts:
+        entry = scores.setdefault(quiz_id, {'best_score': score, 'attempts': 0})
+        entry['best_score'] = max(entry['best_score'], score)
+        entry['latest_score'] = score
+        entry['attempts'] += 1
+        entry['last_attempt_at'] = completed_at
+    return scores
+
+def gradebook_rows(course_id):
+    """
+    Yield ``(enrollment, quiz_scores)`` for every student of a course.
+
+    Enrollments and completed quiz attempts are read through two server-side
+    cursors, both ordered by user, and merged as they stream, so memory use does
+    not depend on the size of the course.
+    """
+    enrollments = Enrollment.objects.filter(course_id=course_id).order_by('user_id').values_list(
+        'user_id', 'user__email', 'user__first_name', 'user__last_name', 'status',
+        'progress', 'completed_lessons', 'total_lessons', 'enrolled_at', 'completed_at',
+    ).iterator(chunk_size=GRADEBOOK_CHUNK_SIZE)
+    attempts = QuizAttempt.objects.filter(
+        course_id=course_id, completed_at__isnull=False
+    ).order_by('user_id', 'completed_at', 'id').values_list(
+        'user_id', 'quiz_id', 'score', 'completed_at'
+    ).iterator(chunk_size=GRADEBOOK_CHUNK_SIZE)
+
+    attempt = next(attempts, None)
+    for enrollment in enrollments:
+        user_id = enrollment[0]
+
+        # Skip attempts by users who are no longer enrolled
+        while attempt is not None and attempt[0] < user_id:
+            attempt = next(attempts, None)
+
+        user_attempts = []
+        while attempt is not None and attempt[0] == user_id:
+            user_attempts.append(attempt)
+            attempt = next(attempts, None)
+
+        yield dict(zip(ENROLLMENT_COLUMNS, enrollment)), _quiz_scores(user_attempts)
+
+def course_quizzes(course_id):
+    return list(Quiz.objects.filter(course_id=course_id).order_by('pk').values_list('pk', 'title'))
+
+def stream_csv(course_id):
+    quizzes = course_quizzes(course_id)
+    writer = csv.writer(Echo())
+
+    header = list(ENROLLMENT_COLUMNS)
+    for _, title in quizzes:
+        header += [f'{title} (best)', f'{title} (latest)', f'{title} (attempts)']
+    yield writer.writerow(header)
+
+    for enrollment, scores in gradebook_rows(course_id):
+        row = [enrollment[column] for column in ENROLLMENT_COLUMNS]
+        for quiz_id, _ in quizzes:
+            entry = scores.get(quiz_id)
+            if entry is None:
+                row += ['', '', 0]
+            else:
+                row += [entry['best_score'], entry['latest_score'], entry['attempts']]
+        yield writer.writerow(row)
+
+def stream_jsonl(course_id):
+    quiz_ids = [quiz_id for quiz_id, _ in course_quizzes(course_id)]
+    for enrollment, scores in gradebook_rows(course_id):
+        enrollment['quizzes'] = [
+            {'quiz': quiz_id, **scores[quiz_id]} for quiz_id in quiz_ids if quiz_id in scores
+        ]
+        yield json.dumps(enrollment, cls=DjangoJSONEncoder) + '\n'
+
+def stream_gradebook(course_id, export_format):
+    if export_format == 'jsonl':
+        return stream_jsonl(course_id)
+    return stream_csv(course_id)
@@ -0,0 +1,183 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .models import LessonProgress
+
+# Flush once this many heartbeats are waiting in the queue
+HEARTBEAT_FLUSH_THRESHOLD = getattr(settings, 'HEARTBEAT_FLUSH_THRESHOLD', 500)
+# ... or once the oldest waiting heartbeat has been queued this many seconds
+HEARTBEAT_FLUSH_INTERVAL = getattr(settings, 'HEARTBEAT_FLUSH_INTERVAL', 60)
+# A queue slot still missing after this many seconds was evicted, not in flight
+HEARTBEAT_SLOT_GRACE = 5
+# Queued heartbeats must outlive many flush intervals, or they expire unwritten
+HEARTBEAT_TIMEOUT = 24 * 60 * 60
+HEARTBEAT_FLUSH_BATCH = 1000
+# A request flushing inline writes at most this many batches; the next caller picks up the rest
+HEARTBEAT_INLINE_FLUSH_BATCHES = 1
+
+SEQ_KEY = 'heartbeat:seq'
+FLUSHED_KEY = 'heartbeat:flushed'
+STALLED_KEY = 'heartbeat:stalled'
+LOCK_KEY = 'heartbeat:flush-lock'
+OLDEST_KEY = 'heartbeat:oldest'
+
+def _entry_key(enrollment_id, lesson_id):
+    return f'heartbeat:entry:{enrollment_id}:{lesson_id}'
+
+def _slot_key(slot):
+    return f'heartbeat:slot:{slot}'
+
+def _reserve_slots(count):
+    try:
+        return cache.incr(SEQ_KEY, count)
+    except ValueError:
+        if cache.add(SEQ_KEY, count, None):
+            return count
+        return cache.incr(SEQ_KEY, count)
+
+def buffer_positions(updates):
+    """
+    Queue ``(enrollment_id, lesson_id, last_position, watched_duration)`` heartbeats.
+
+    The latest position per lesson wins; queued heartbeats are written to
+    ``LessonProgress`` in bulk by ``flush_positions`` once enough of them are
+    waiting or the oldest has waited ``HEARTBEAT_FLUSH_INTERVAL`` seconds.
+    """
+    if not updates:
+        return 0
+
+    now = timezone.now()
+    entries = {}
+    for enrollment_id, lesson_id, last_position, watched_duration in updates:
+        entries[_entry_key(enrollment_id, lesson_id)] = (
+            enrollment_id, lesson_id, last_position, watched_duration, now
+        )
+    cache.set_many(entries, HEARTBEAT_TIMEOUT)
+
+    keys = list(entries)
+    last_slot = _reserve_slots(len(keys))
+    first_slot = last_slot - len(keys) + 1
+    cache.set_many({
+        _slot_key(slot): key for slot, key in zip(range(first_slot, last_slot + 1), keys)
+    }, HEARTBEAT_TIMEOUT)
+    cache.add(OLDEST_KEY, time.time(), None)
+
+    if flush_due(last_slot):
+        flush_positions(max_batches=HEARTBEAT_INLINE_FLUSH_BATCHES)
+
+    return len(keys)
+
+def flush_due(last_slot=None):
+    """Whether the queue is long enough, or its oldest heartbeat old enough, to flush."""
+    if last_slot is None:
+        last_slot = cache.get(SEQ_KEY) or 0
+    if last_slot - (cache.get(FLUSHED_KEY) or 0) >= HEARTBEAT_FLUSH_THRESHOLD:
+        return True
+    oldest = cache.get(OLDEST_KEY)
+    return oldest is not None and time.time() - oldest >= HEARTBEAT_FLUSH_INTERVAL
+
+def discard_position(enrollment_id, lesson_id):
+    """Forget a queued heartbeat superseded by a write-through update."""
+    cache.delete(_entry_key(enrollment_id, lesson_id))
+
+def buffered_position(enrollment_id, lesson_id):
+    return cache.get(_entry_key(enrollment_id, lesson_id))
+
+def _slot_is_lost(slot):
+    # A slot is reserved before it is written; only give up on it after a grace period
+    stalled = cache.get(STALLED_KEY)
+    if stalled is None or stalled[0] != slot:
+        cache.set(STALLED_KEY, (slot, time.time()), HEARTBEAT_TIMEOUT)
+        return False
+    return time.time() - stalled[1] > HEARTBEAT_SLOT_GRACE
+
+def _write_entries(entries):
+    rows = {}
+    enrollment_ids = {entry[0] for entry in entries}
+    lesson_ids = {entry[1] for entry in entries}
+
+    def load_rows():
+        for row in LessonProgress.objects.filter(
+            enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids
+        ).only('id', 'enrollment_id', 'lesson_id', 'viewed_at'):
+            rows[row.enrollment_id, row.lesson_id] = row
+
+    load_rows()
+    missing = [
+        LessonProgress(
+            enrollment_id=enrollment_id, lesson_id=lesson_id,
+            last_position=last_position, watched_duration=watched_duration,
+        )
+        for enrollment_id, lesson_id, last_position, watched_duration, _ in entries
+        if (enrollment_id, lesson_id) not in rows
+    ]
+    if missing:
+        LessonProgress.objects.bulk_create(missing, ignore_conflicts=True)
+        load_rows()
+
+    changed = []
+    for enrollment_id, lesson_id, last_position, watched_duration, seen_at in entries:
+        row = rows.get((enrollment_id, lesson_id))
+        # Last writer wins; skip heartbeats older than what is already stored
+        if row is None or (row.viewed_at and row.viewed_at > seen_at):
+            continue
+        row.last_position = last_position
+        row.watched_duration = watched_duration
+        row.viewed_at = seen_at
+        changed.append(row)
+
+    LessonProgress.objects.bulk_update(changed, ['last_position', 'watched_duration', 'viewed_at'])
+    return len(changed)
+
+def flush_positions(max_batches=None):
+    """
+    Write queued heartbeats to the database; returns the number of rows updated.
+
+    ``max_batches`` bounds the work of one call; heartbeats left queued keep
+    the queue due, so the next caller continues where this one stopped.
+    """
+    if not cache.add(LOCK_KEY, 1, 60):
+        return 0
+
+    written = 0
+    try:
+        flushed = cache.get(FLUSHED_KEY) or 0
+        last_slot = cache.get(SEQ_KEY) or 0
+
+        batches = 0
+        while flushed < last_slot and (max_batches is None or batches < max_batches):
+            batches += 1
+            slots = range(flushed + 1, min(flushed + HEARTBEAT_FLUSH_BATCH, last_slot) + 1)
+            found = cache.get_many([_slot_key(slot) for slot in slots])
+
+            entry_keys = set()
+            done = flushed
+            for slot in slots:
+                key = found.get(_slot_key(slot))
+                if key is None and not _slot_is_lost(slot):
+                    break
+                if key is not None:
+                    entry_keys.add(key)
+                done = slot
+
+            entries = [entry for entry in cache.get_many(list(entry_keys)).values()]
+            if entries:
+                written += _write_entries(entries)
+
+            cache.delete_many([_slot_key(slot) for slot in range(flushed + 1, done + 1)])
+            cache.set(FLUSHED_KEY, done, None)
+            if done < slots[-1]:
+                break
+            flushed = done
+
+        if flushed >= last_slot:
+            # Caught up; heartbeats queued during the flush restart the clock
+            cache.delete(OLDEST_KEY)
+            if (cache.get(SEQ_KEY) or 0) > last_slot:
+                cache.add(OLDEST_KEY, time.time(), None)
+    finally:
+        cache.delete(LOCK_KEY)
+
+    return written
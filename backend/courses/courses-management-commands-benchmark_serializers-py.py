@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from lms_project.compiled import compile_serializer
+from courses.models import Course, Enrollment, LessonProgress
+from courses.serializers import CourseListSerializer, EnrollmentSerializer, LessonProgressSerializer
+from quizzes.models import QuizAttempt
+from quizzes.serializers import QuizResultSerializer
+
+class Command(BaseCommand):
+    help = 'Compare rows per second of the regular and compiled list serializers'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help='Rows per serializer')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the fastest counts')
+    
+    def _best_of(self, repeat, render):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
+    
+    def handle(self, *args, **options):
+        limit = options['limit']
+        cases = [
+            (CourseListSerializer, Course.objects.select_related('instructor__profile', 'category')),
+            (EnrollmentSerializer, Enrollment.objects.select_related(
+                'user__profile', 'course__instructor__profile', 'course__category'
+            )),
+            (LessonProgressSerializer, LessonProgress.objects.all()),
+            (QuizResultSerializer, QuizAttempt.objects.all()),
+        ]
+        renderer = JSONRenderer()
+        
+        for serializer_class, queryset in cases:
+            name = serializer_class.__name__
+            compiled = compile_serializer(serializer_class)
+            if compiled is None:
+                self.stderr.write(f'{name} cannot be compiled.')
+                continue
+            
+            # Both paths include their queries
+            queryset = queryset.order_by('pk')
+            regular_time, regular = self._best_of(
+                options['repeat'], lambda: serializer_class(queryset.all()[:limit], many=True).data
+            )
+            compiled_time, fast = self._best_of(
+                options['repeat'], lambda: compiled.render_many(compiled.values(queryset)[:limit])
+            )
+            
+            rows = len(regular)
+            if not rows:
+                self.stdout.write(f'{name}: no rows to serialize.')
+                continue
+            
+            identical = renderer.render(regular) == renderer.render(fast)
+            self.stdout.write(
+                f'{name}: {rows} rows, regular {rows / regular_time:,.0f} rows/s, '
+                f'compiled {rows / compiled_time:,.0f} rows/s '
+                f'({regular_time / compiled_time:.1f}x), identical output: {"yes" if identical else "NO"}'
+            )
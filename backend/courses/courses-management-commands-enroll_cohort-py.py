@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses.cohorts import enroll_cohort, read_identifiers
+from courses.models import Course
+
+class Command(BaseCommand):
+    help = 'Enroll a cohort of users, given by id or email, in a course'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int)
+        parser.add_argument('users', nargs='*', help='User ids or emails')
+        parser.add_argument('--file', help='CSV file with a user id or email in the first column')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        if not Course.objects.filter(pk=options['course_id']).exists():
+            raise CommandError(f'Course {options["course_id"]} does not exist.')
+        
+        identifiers = list(options['users'])
+        if options['file']:
+            with open(options['file'], 'rb') as upload:
+                identifiers += read_identifiers(upload)
+        
+        summary, results = enroll_cohort(options['course_id'], identifiers, options['chunk_size'])
+        for result in results:
+            if result['status'] == 'not_found':
+                self.stderr.write(f'No user matches {result["identifier"]}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Enrolled {summary["enrolled"]} users; {summary["already_enrolled"]} already enrolled, '
+            f'{summary["duplicate"]} duplicates, {summary["not_found"]} not found.'
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from courses.heartbeats import HEARTBEAT_FLUSH_INTERVAL, flush_due, flush_positions
+
+class Command(BaseCommand):
+    help = 'Write buffered video heartbeat positions to LessonProgress'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running and flush whenever the queue is due, so quiet periods are written too'
+        )
+        parser.add_argument('--interval', type=int, default=HEARTBEAT_FLUSH_INTERVAL)
+    
+    def handle(self, *args, **options):
+        if not options['watch']:
+            written = flush_positions()
+            self.stdout.write(self.style.SUCCESS(f'Flushed {written} lesson positions.'))
+            return
+        
+        while True:
+            if flush_due():
+                written = flush_positions()
+                if written:
+                    self.stdout.write(f'Flushed {written} lesson positions.')
+            time.sleep(max(1, options['interval'] // 2))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from courses.categories import rebuild_category_paths
+
+class Command(BaseCommand):
+    help = 'Recompute materialized category paths from parent links'
+    
+    def handle(self, *args, **options):
+        rebuilt = rebuild_category_paths()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt paths for {rebuilt} categories.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from courses.stats import rebuild_course_stats
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized enrollment and review statistics for courses'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Only rebuild these courses')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        rebuilt = rebuild_course_stats(options['course_ids'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {rebuilt} courses.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from courses.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents for every course'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        rebuilt = rebuild_search_index(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {rebuilt} courses.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from courses.progress import recompute_all_progress
+
+class Command(BaseCommand):
+    help = 'Recompute lesson counters, progress and completion status for enrollments'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help='Only recompute these courses')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+    
+    def handle(self, *args, **options):
+        recomputed = recompute_all_progress(options['course_ids'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed progress for {recomputed} enrollments.'))
@@ -1,21 +1,71 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
 from django.utils.text import slugify
 
+try:
+    from django.contrib.postgres.search import SearchVectorField
+except ImportError:
+    # Needs psycopg, which only PostgreSQL deployments install; elsewhere the column is never created
+    SearchVectorField = models.TextField
+
 User = get_user_model()
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     parent = models.ForeignKey('self', blank=True, null=True, on_delete=models.CASCADE, related_name='children')
+    # Materialized path of ancestor ids, e.g. "1/5/12/"; a subtree shares its root's prefix
+    path = models.CharField(max_length=255, db_index=True, blank=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+    
+    TREE_FIELDS = ('path', 'depth')
     
     class Meta:
         verbose_name_plural = 'Categories'
     
+    def save(self, *args, **kwargs):
+        previous = None
+        if not self._state.adding:
+            previous = Category.objects.filter(pk=self.pk).values_list('path', 'depth').first()
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.TREE_FIELDS
+                ]
+        super().save(*args, **kwargs)
+        
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+        self.path = f'{parent_path}{self.pk}/'
+        self.depth = self.path.count('/') - 1
+        
+        if previous and previous == (self.path, self.depth):
+            return
+        Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        
+        # Re-root a moved subtree in one statement
+        if previous and previous[0]:
+            old_path, old_depth = previous
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
+    
     def __str__(self):
         return self.name
 
 class Course(models.Model):
+    # Counters maintained with in-place updates that a full save must never overwrite
+    COUNTER_FIELDS = (
+        'enrollment_count', 'review_count', 'rating_sum',
+        'rating_1_count', 'rating_2_count', 'rating_3_count',
+        'rating_4_count', 'rating_5_count',
+    )
+    
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     description = models.TextField()
@@ -27,9 +77,46 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Denormalized statistics, kept current by courses.stats
+    enrollment_count = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    # Bumped by courses.versions when sections and lessons, or reviews and
+    # announcements change; they feed the conditional GET validators
+    curriculum_version = models.PositiveIntegerField(default=1, editable=False)
+    feed_version = models.PositiveIntegerField(default=1, editable=False)
+    
+    VERSION_FIELDS = ('curriculum_version', 'feed_version')
+    
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+    
+    @property
+    def rating_histogram(self):
+        return {
+            str(rating): getattr(self, f'rating_{rating}_count')
+            for rating in range(1, 6)
+        }
+    
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS + self.VERSION_FIELDS
+            ]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -86,9 +173,23 @@ class Enrollment(models.Model):
     completed_at = models.DateTimeField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     progress = models.FloatField(default=0.0)  # Percentage of course completed
+    # Lesson counters behind progress, maintained in place by courses.progress
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
+    total_lessons = models.PositiveIntegerField(default=0, editable=False)
+    
+    COUNTER_FIELDS = ('completed_lessons', 'total_lessons')
     
     class Meta:
         unique_together = ['user', 'course']
+        indexes = [models.Index(fields=['enrolled_at', 'id'])]
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.user.email} - {self.course.title}"
@@ -115,6 +216,7 @@ class Announcement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['course', '-created_at', '-id'])]
     
     def __str__(self):
         return self.title
@@ -129,6 +231,30 @@ class Review(models.Model):
     class Meta:
         unique_together = ['user', 'course']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['course', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.course.title} - {self.rating}"
+
+class CourseSearchDocument(models.Model):
+    """Denormalized full-text document per course, maintained by courses.search."""
+    # No cascade: the table only exists on PostgreSQL, where courses.search deletes the document itself
+    course = models.OneToOneField(
+        Course, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name='search_document'
+    )
+    title = models.TextField()
+    keywords = models.TextField(blank=True)  # Category, instructor and lesson titles
+    body = models.TextField(blank=True)
+    vector = SearchVectorField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        # Other databases use the in-process index in courses.search instead
+        required_db_vendor = 'postgresql'
+        indexes = [GinIndex(fields=['vector'])]
+    
+    def __str__(self):
+        return self.title
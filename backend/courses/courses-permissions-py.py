@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .authz import course_id_for, get_authorization
 
 class IsInstructorOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -11,40 +12,25 @@ class IsInstructorOrReadOnly(permissions.BasePermission):
             return True
         
         # Allow instructor who owns the course
-        if hasattr(obj, 'instructor'):
-            return obj.instructor == request.user
+        if hasattr(obj, 'instructor_id'):
+            return obj.instructor_id == request.user.pk
         
-        # For sections and lessons, check course instructor
-        if hasattr(obj, 'course'):
-            return obj.course.instructor == request.user
-        
-        if hasattr(obj, 'section'):
-            return obj.section.course.instructor == request.user
+        # For sections, lessons and other course content, check the courses the user teaches
+        if hasattr(obj, 'course_id') or hasattr(obj, 'section_id'):
+            return get_authorization(request).teaches(course_id_for(obj))
         
         return False
 
 class IsEnrolledOrInstructor(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        
         # Get course from different object types
-        course = None
-        if hasattr(obj, 'course'):
-            course = obj.course
-        elif hasattr(obj, 'section'):
-            course = obj.section.course
-        elif hasattr(obj, 'lesson'):
-            course = obj.lesson.section.course
-        
-        if not course:
+        course_id = course_id_for(obj)
+        if course_id is None:
             return False
         
-        # Check if user is instructor of the course
-        if course.instructor == user:
-            return True
-        
-        # Check if user is enrolled in the course
-        return user.enrollments.filter(course=course, status='active').exists()
+        # Check if user is instructor of, or actively enrolled in, the course
+        authorization = get_authorization(request)
+        return authorization.teaches(course_id) or authorization.is_enrolled(course_id)
 
 class IsInstructorOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
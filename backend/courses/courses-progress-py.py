@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField,
+    OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from lms_project.transactions import on_commit_once
+from .models import Course, Enrollment, Lesson, LessonProgress
+from .authz import invalidate_authorization
+
+def _progress_expression(completed_delta=0):
+    # Every right-hand side of an UPDATE sees the old row, so fold the delta in here
+    completed = Cast(F('completed_lessons') + completed_delta, FloatField())
+    return Case(
+        When(total_lessons=0, then=Value(0.0)),
+        default=ExpressionWrapper(completed * 100.0 / F('total_lessons'), output_field=FloatField()),
+        output_field=FloatField(),
+    )
+
+def init_enrollment(enrollment):
+    """Seed a new enrollment's lesson total from its course."""
+    total = Lesson.objects.filter(section__course_id=enrollment.course_id).count()
+    Enrollment.objects.filter(pk=enrollment.pk).update(total_lessons=total)
+    enrollment.total_lessons = total
+
+def apply_completion_delta(enrollment_id, delta):
+    """Shift an enrollment's completed lesson counter and progress by ``delta`` in one UPDATE."""
+    Enrollment.objects.filter(pk=enrollment_id).update(
+        completed_lessons=F('completed_lessons') + delta,
+        progress=_progress_expression(delta),
+    )
+
+    # Check if course is completed
+    if delta > 0:
+        completed = Enrollment.objects.filter(
+            pk=enrollment_id,
+            total_lessons__gt=0,
+            completed_lessons__gte=F('total_lessons'),
+        ).exclude(status='completed').update(status='completed', completed_at=timezone.now())
+        # UPDATE sends no post_save, so drop the cached active enrollments here
+        if completed:
+            invalidate_authorization(
+                Enrollment.objects.filter(pk=enrollment_id).values_list('user_id', flat=True).first()
+            )
+
+def record_lesson_progress(enrollment_id, lesson_id, is_completed, last_position=None, watched_duration=None):
+    """
+    Write a learner's progress on one lesson.
+    
+    ``None`` positions keep the stored values. The enrollment counters only
+    change when ``is_completed`` actually flips, and the flip is detected with
+    a conditional UPDATE so concurrent heartbeats never double count.
+    """
+    now = timezone.now()
+    progress, created = LessonProgress.objects.get_or_create(
+        enrollment_id=enrollment_id,
+        lesson_id=lesson_id,
+        defaults={
+            'is_completed': is_completed,
+            'last_position': last_position or 0,
+            'watched_duration': watched_duration or 0,
+        }
+    )
+    
+    if created:
+        if is_completed:
+            apply_completion_delta(enrollment_id, 1)
+        return progress
+    
+    positions = {'viewed_at': now}
+    if last_position is not None:
+        positions['last_position'] = last_position
+    if watched_duration is not None:
+        positions['watched_duration'] = watched_duration
+    
+    flipped = LessonProgress.objects.filter(
+        pk=progress.pk, is_completed=not is_completed
+    ).update(is_completed=is_completed, **positions)
+    
+    if flipped:
+        apply_completion_delta(enrollment_id, 1 if is_completed else -1)
+    else:
+        LessonProgress.objects.filter(pk=progress.pk).update(**positions)
+    
+    progress.is_completed = is_completed
+    for field, value in positions.items():
+        setattr(progress, field, value)
+    return progress
+
+def recompute_course_progress(course_id, chunk_size=5000):
+    """
+    Rebuild counters, progress and status for every enrollment of a course.
+    
+    Each chunk of enrollments is fixed with a handful of set-based UPDATEs,
+    so the cost does not grow with one ORM save per enrollment.
+    """
+    total = Lesson.objects.filter(section__course_id=course_id).count()
+    completed = Subquery(
+        LessonProgress.objects.filter(
+            enrollment=OuterRef('pk'),
+            is_completed=True,
+            lesson__section__course_id=course_id,
+        ).order_by().values('enrollment').annotate(n=Count('pk')).values('n'),
+        output_field=IntegerField(),
+    )
+    
+    pks = list(
+        Enrollment.objects.filter(course_id=course_id)
+        .order_by('pk').values_list('pk', flat=True)
+    )
+    now = timezone.now()
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        enrollments = Enrollment.objects.filter(
+            course_id=course_id, pk__gte=chunk[0], pk__lte=chunk[-1]
+        )
+        
+        with transaction.atomic():
+            enrollments.update(total_lessons=total, completed_lessons=Coalesce(completed, 0))
+            enrollments.update(progress=_progress_expression())
+            completing = enrollments.filter(
+                status='active', total_lessons__gt=0,
+                completed_lessons__gte=F('total_lessons'),
+            )
+            # Revoke completion once new lessons leave something unfinished
+            reopening = enrollments.filter(
+                status='completed', total_lessons__gt=0,
+                completed_lessons__lt=F('total_lessons'),
+            )
+            # Status changes skip post_save, so drop those users' cached active enrollments here
+            changed_user_ids = [
+                *completing.values_list('user_id', flat=True),
+                *reopening.values_list('user_id', flat=True),
+            ]
+            completing.update(status='completed', completed_at=now)
+            reopening.update(status='active', completed_at=None)
+            invalidate_authorization(*changed_user_ids)
+    
+    return len(pks)
+
+def recompute_all_progress(course_ids=None, chunk_size=5000):
+    courses = Course.objects.order_by('pk')
+    if course_ids:
+        courses = courses.filter(pk__in=course_ids)
+    
+    recomputed = 0
+    for course_id in courses.values_list('pk', flat=True):
+        recomputed += recompute_course_progress(course_id, chunk_size)
+    return recomputed
+
+def _recompute_courses(course_ids):
+    for course_id in sorted(course_ids):
+        recompute_course_progress(course_id)
+
+def schedule_course_recompute(*course_ids):
+    """Recompute the enrollments of ``course_ids`` once the current transaction commits."""
+    on_commit_once('course_recompute', course_ids, _recompute_courses)
@@ -0,0 +1,183 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, IntegerField, When
+from rest_framework.filters import BaseFilterBackend
+from lms_project.transactions import on_commit_once
+from .models import Course, CourseSearchDocument, Lesson
+
+SEARCH_PARAM = 'search'
+VERSION_KEY = 'course-search:version'
+# Ranking weights, mirrored by setweight() labels on PostgreSQL
+WEIGHTS = {'title': 1.0, 'keywords': 0.4, 'body': 0.2}
+
+TOKEN_RE = re.compile(r'\w+')
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+def use_postgres():
+    return connection.vendor == 'postgresql'
+
+def build_documents(course_ids):
+    """Return ``{course_id: {'title': ..., 'keywords': ..., 'body': ...}}`` in two queries."""
+    lesson_titles = defaultdict(list)
+    for course_id, title in Lesson.objects.filter(
+        section__course_id__in=course_ids
+    ).order_by('section__order', 'order').values_list('section__course_id', 'title'):
+        lesson_titles[course_id].append(title)
+
+    documents = {}
+    for course in Course.objects.filter(pk__in=course_ids).select_related('category', 'instructor'):
+        instructor = course.instructor
+        keywords = [
+            course.category.name,
+            instructor.first_name, instructor.last_name, instructor.username,
+            *lesson_titles[course.pk],
+        ]
+        documents[course.pk] = {
+            'title': course.title,
+            'keywords': ' '.join(filter(None, keywords)),
+            'body': course.description,
+        }
+    return documents
+
+def refresh_documents(course_ids):
+    """Rebuild the stored search documents for ``course_ids``."""
+    if not use_postgres():
+        bump_index_version()
+        return
+
+    from django.contrib.postgres.search import SearchVector
+
+    course_ids = list(course_ids)
+    documents = build_documents(course_ids)
+    CourseSearchDocument.objects.filter(pk__in=set(course_ids) - set(documents)).delete()
+    CourseSearchDocument.objects.bulk_create(
+        [CourseSearchDocument(course_id=pk, **fields) for pk, fields in documents.items()],
+        update_conflicts=True,
+        unique_fields=['course'],
+        update_fields=['title', 'keywords', 'body'],
+    )
+    CourseSearchDocument.objects.filter(pk__in=list(documents)).update(
+        vector=(
+            SearchVector('title', weight='A', config='english')
+            + SearchVector('keywords', weight='B', config='english')
+            + SearchVector('body', weight='C', config='english')
+        )
+    )
+
+def delete_documents(course_ids):
+    """Delete the documents of deleted courses, which the database no longer cascades to."""
+    if use_postgres():
+        CourseSearchDocument.objects.filter(pk__in=list(course_ids)).delete()
+
+def schedule_refresh(course_ids):
+    """Refresh the documents of ``course_ids`` once the current transaction commits."""
+    on_commit_once('search_refresh', course_ids, refresh_documents)
+
+def rebuild_search_index(chunk_size=1000):
+    pks = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), chunk_size):
+        refresh_documents(pks[start:start + chunk_size])
+    bump_index_version()
+    return len(pks)
+
+def bump_index_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+
+
+class InvertedIndex:
+    """
+    Pure-Python course index used when the database has no full-text search.
+
+    Postings map each token to per-course weights; a sorted token list gives
+    prefix matching through bisection.
+    """
+
+    def __init__(self, documents):
+        postings = defaultdict(lambda: defaultdict(float))
+        for course_id, fields in documents.items():
+            for field, weight in WEIGHTS.items():
+                for token in tokenize(fields[field]):
+                    postings[token][course_id] += weight
+        self.postings = {token: dict(scores) for token, scores in postings.items()}
+        self.tokens = sorted(self.postings)
+
+    def _prefix_scores(self, term):
+        scores = defaultdict(float)
+        position = bisect_left(self.tokens, term)
+        while position < len(self.tokens) and self.tokens[position].startswith(term):
+            for course_id, score in self.postings[self.tokens[position]].items():
+                # Whole-word matches outrank prefix matches
+                scores[course_id] += score if self.tokens[position] == term else score / 2
+            position += 1
+        return scores
+
+    def search(self, terms):
+        """Return course ids matching every term, best first."""
+        ranked = None
+        for term in terms:
+            scores = self._prefix_scores(term)
+            if ranked is None:
+                ranked = scores
+            else:
+                ranked = {pk: ranked[pk] + scores[pk] for pk in ranked if pk in scores}
+            if not ranked:
+                return []
+        return sorted(ranked, key=lambda pk: (-ranked[pk], pk))
+
+
+_index_lock = threading.Lock()
+_index = {'version': None, 'index': None}
+
+def get_inverted_index():
+    version = cache.get(VERSION_KEY)
+    with _index_lock:
+        if _index['index'] is None or _index['version'] != version:
+            pks = list(Course.objects.values_list('pk', flat=True))
+            _index['index'] = InvertedIndex(build_documents(pks))
+            _index['version'] = version
+        return _index['index']
+
+def search_courses(queryset, terms, ranked=True):
+    """Filter ``queryset`` to courses matching all ``terms`` as prefixes, optionally best first."""
+    if use_postgres():
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='english')
+        queryset = queryset.filter(search_document__vector=query)
+        if ranked:
+            queryset = queryset.annotate(
+                search_rank=SearchRank(F('search_document__vector'), query)
+            ).order_by('-search_rank', 'pk')
+        return queryset
+
+    course_ids = get_inverted_index().search(terms)
+    queryset = queryset.filter(pk__in=course_ids)
+    if ranked and course_ids:
+        queryset = queryset.order_by(Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(course_ids)],
+            output_field=IntegerField(),
+        ))
+    return queryset
+
+
+class CourseSearchFilter(BaseFilterBackend):
+    """Ranked prefix search over course search documents via ``?search=``."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = tokenize(request.query_params.get(SEARCH_PARAM, ''))
+        if not terms:
+            return queryset
+
+        # An explicit ?ordering= wins over relevance
+        ranked = not request.query_params.get('ordering')
+        return search_courses(queryset, terms, ranked=ranked)
@@ -1,16 +1,42 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from lms_project.dynamic_fields import DynamicFieldsMixin
 from .models import (
     Category, Course, Section, Lesson, 
     Enrollment, LessonProgress, Announcement, Review
 )
 from users.serializers import UserSerializer
 
-class CategorySerializer(serializers.ModelSerializer):
+# Newest reviews and announcements embedded in a course; the rest are paginated
+EMBEDDED_ITEMS_LIMIT = 10
+
+class NewestItemsSerializer(serializers.ListSerializer):
+    """Render only the newest ``limit`` rows of a reverse relation, in one query."""
+    
+    def __init__(self, *args, limit, ordering, select_related=(), **kwargs):
+        self.limit = limit
+        self.ordering = ordering
+        self.select_related = select_related
+        super().__init__(*args, **kwargs)
+    
+    def get_attribute(self, instance):
+        queryset = super().get_attribute(instance).order_by(*self.ordering)
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset[:self.limit]
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'parent']
+    
+    def validate_parent(self, parent):
+        # A category cannot move under itself or one of its descendants
+        if parent and self.instance and self.instance.path and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('A category cannot be moved into its own subtree.')
+        return parent
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -18,14 +44,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'course', 'user', 'rating', 'comment', 'created_at']
         read_only_fields = ['created_at']
 
-class LessonProgressSerializer(serializers.ModelSerializer):
+class LessonProgressSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = LessonProgress
         fields = [
             'id', 'enrollment', 'lesson', 'is_completed',
             'watched_duration', 'last_position', 'viewed_at'
         ]
-        read_only_fields = ['viewed_at']Serializer(serializers.ModelSerializer):
+        read_only_fields = ['viewed_at']
+
+class LessonSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Lesson
         fields = [
@@ -34,42 +62,57 @@ class LessonProgressSerializer(serializers.ModelSerializer):
             'quiz', 'order', 'duration'
         ]
 
-class SectionSerializer(serializers.ModelSerializer):
+class SectionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     lessons = LessonSerializer(many=True, read_only=True)
     
     class Meta:
         model = Section
         fields = ['id', 'course', 'title', 'description', 'order', 'lessons']
 
-class AnnouncementSerializer(serializers.ModelSerializer):
+class AnnouncementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Announcement
         fields = ['id', 'course', 'title', 'content', 'created_at']
         read_only_fields = ['created_at']
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     instructor = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     enrollment_count = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
     average_rating = serializers.FloatField(read_only=True)
     
+    # Model fields behind properties, for lms_project.compiled
+    compiled_dependencies = {'average_rating': ['rating_sum', 'review_count']}
+    
     class Meta:
         model = Course
         fields = [
             'id', 'title', 'slug', 'description', 'category',
             'instructor', 'thumbnail', 'price', 'is_published',
-            'created_at', 'updated_at', 'enrollment_count', 'average_rating'
+            'created_at', 'updated_at', 'enrollment_count', 'review_count',
+            'average_rating'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     instructor = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     sections = SectionSerializer(many=True, read_only=True)
-    announcements = AnnouncementSerializer(many=True, read_only=True)
-    reviews = ReviewSerializer(many=True, read_only=True)
+    announcements = NewestItemsSerializer(
+        child=AnnouncementSerializer(), read_only=True,
+        limit=EMBEDDED_ITEMS_LIMIT, ordering=['-created_at', '-id']
+    )
+    reviews = NewestItemsSerializer(
+        child=ReviewSerializer(), read_only=True,
+        limit=EMBEDDED_ITEMS_LIMIT, ordering=['-created_at', '-id'], select_related=['user__profile']
+    )
     enrollment_count = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
     average_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    reviews_url = serializers.SerializerMethodField()
+    announcements_url = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
@@ -77,11 +120,23 @@ class CourseDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'description', 'category',
             'instructor', 'thumbnail', 'price', 'is_published',
             'created_at', 'updated_at', 'sections', 'announcements',
-            'reviews', 'enrollment_count', 'average_rating'
+            'reviews', 'enrollment_count', 'review_count', 'average_rating',
+            'rating_histogram', 'reviews_url', 'announcements_url'
         ]
         read_only_fields = ['created_at', 'updated_at']
+    
+    # Cursor-paginated lists holding everything beyond the embedded items
+    def _list_url(self, view_name, obj):
+        url = reverse(view_name, request=self.context.get('request'))
+        return f'{url}?course_id={obj.pk}&pagination=cursor'
+    
+    def get_reviews_url(self, obj):
+        return self._list_url('review-list', obj)
+    
+    def get_announcements_url(self, obj):
+        return self._list_url('announcement-list', obj)
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     course = CourseListSerializer(read_only=True)
     
@@ -89,8 +144,7 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         model = Enrollment
         fields = [
             'id', 'user', 'course', 'enrolled_at',
-            'completed_at', 'status', 'progress'
+            'completed_at', 'status', 'progress',
+            'completed_lessons', 'total_lessons'
         ]
         read_only_fields = ['enrolled_at', 'completed_at']
-
-class Lesson
\ No newline at end of file
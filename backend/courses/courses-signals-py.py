@@ -0,0 +1,237 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from lms_project.cache import category_tags, course_detail_tags, course_tags, invalidate_tags
+from lms_project.transactions import is_pending
+from .models import Category, Course, Section, Lesson, Enrollment, Review, Announcement
+from . import categories, progress, search, stats, versions
+from .authz import invalidate_authorization
+from quizzes.ownership import assign_quiz_course
+from users.models import UserProfile
+
+User = get_user_model()
+
+_deleting = threading.local()
+
+def _deleting_marks():
+    """``{course_id: (section_ids, forget)}`` for the courses this thread's open transactions are deleting."""
+    if not hasattr(_deleting, 'courses'):
+        _deleting.courses = {}
+    return _deleting.courses
+
+def _deleting_courses():
+    """``{course_id: section_ids}`` of the courses being deleted."""
+    marks = _deleting_marks()
+    # A delete that fails never reaches post_delete; rolling back discards its ``forget`` callback instead
+    for course_id, (section_ids, forget) in list(marks.items()):
+        if not is_pending(forget):
+            del marks[course_id]
+    return {course_id: section_ids for course_id, (section_ids, forget) in marks.items()}
+
+def _cascading(signal, course_id=None, section_id=None):
+    """Whether a row is deleted along with its whole course, which makes per-row bookkeeping moot."""
+    if signal is not post_delete:
+        return False
+    deleting = _deleting_courses()
+    if course_id is not None:
+        return course_id in deleting
+    return any(section_id in section_ids for section_ids in deleting.values())
+
+def _lesson_course_id(lesson):
+    return Section.objects.filter(pk=lesson.section_id).values_list('course_id', flat=True).first()
+
+@receiver(post_init, sender=Course)
+def remember_course_instructor(sender, instance, **kwargs):
+    instance._loaded_instructor_id = instance.__dict__.get('instructor_id')
+
+@receiver(pre_delete, sender=Course)
+def course_deleting(sender, instance, **kwargs):
+    # Enrollments, reviews and the rest are deleted first; let their receivers skip the counters
+    course_id = instance.pk
+    
+    def forget():
+        _deleting_marks().pop(course_id, None)
+    
+    # The mark lasts as long as the transaction deleting the course
+    transaction.on_commit(forget)
+    _deleting_marks()[course_id] = (set(instance.sections.values_list('pk', flat=True)), forget)
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    _deleting_marks().pop(instance.pk, None)
+    invalidate_tags(course_tags(instance.pk))
+    if kwargs['signal'] is post_delete:
+        search.delete_documents([instance.pk])
+    search.schedule_refresh([instance.pk])
+    categories.invalidate_category_tree()
+    
+    if kwargs.get('created') or kwargs['signal'] is post_delete or instance._loaded_instructor_id != instance.instructor_id:
+        invalidate_authorization(instance.instructor_id, instance._loaded_instructor_id)
+        instance._loaded_instructor_id = instance.instructor_id
+
+@receiver(post_init, sender=Section)
+def remember_section_course(sender, instance, **kwargs):
+    instance._loaded_course_id = instance.__dict__.get('course_id')
+
+@receiver([post_save, post_delete], sender=Section)
+def section_changed(sender, instance, created=False, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    versions.bump_curriculum_version(instance.course_id, instance._loaded_course_id)
+    
+    # Quizzes and searchable lesson titles follow their lessons into the new course
+    if kwargs['signal'] is post_save and not created and instance._loaded_course_id != instance.course_id:
+        for quiz_id in instance.lessons.filter(quiz__isnull=False).values_list('quiz_id', flat=True):
+            assign_quiz_course(quiz_id, instance.course_id)
+        invalidate_tags(course_tags(instance.course_id) + course_tags(instance._loaded_course_id))
+        search.schedule_refresh([instance.course_id, instance._loaded_course_id])
+    instance._loaded_course_id = instance.course_id
+
+# Enrollment and review counters are listed; sections and announcements only show in detail
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_course_counters_cache(sender, instance, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    invalidate_tags(course_tags(instance.course_id))
+
+@receiver([post_save, post_delete], sender=Section)
+@receiver([post_save, post_delete], sender=Announcement)
+def invalidate_course_child_cache(sender, instance, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    invalidate_tags(course_detail_tags(instance.course_id))
+
+@receiver(post_init, sender=Lesson)
+def remember_lesson_quiz(sender, instance, **kwargs):
+    instance._loaded_quiz_id = instance.__dict__.get('quiz_id')
+    instance._loaded_section_id = instance.__dict__.get('section_id')
+    instance._loaded_title = instance.__dict__.get('title')
+
+@receiver([post_save, post_delete], sender=Lesson)
+def lesson_changed(sender, instance, created=False, **kwargs):
+    # The quiz loses its course through the foreign key; nothing else outlives the course
+    if _cascading(kwargs['signal'], section_id=instance.section_id):
+        return
+    
+    course_id = _lesson_course_id(instance)
+    deleted = kwargs['signal'] is post_delete
+    
+    # Keep the quiz's denormalized course in step with the lesson linking it
+    if instance._loaded_quiz_id not in (None, instance.quiz_id):
+        assign_quiz_course(instance._loaded_quiz_id, None)
+    if instance.quiz_id is not None:
+        assign_quiz_course(instance.quiz_id, None if deleted else course_id)
+    instance._loaded_quiz_id = instance.quiz_id
+    
+    # A lesson moved out of another section changes that course's curriculum too
+    previous_course_id = None
+    if instance._loaded_section_id not in (None, instance.section_id):
+        previous_course_id = Section.objects.filter(pk=instance._loaded_section_id).values_list('course_id', flat=True).first()
+    instance._loaded_section_id = instance.section_id
+    versions.bump_curriculum_version(course_id, previous_course_id)
+    
+    # Nothing left to update once the section itself is gone
+    if course_id is None:
+        return
+    
+    moved_course_id = previous_course_id if previous_course_id != course_id else None
+    # Lesson titles are searchable, and search results are cached list pages
+    retitled = instance._loaded_title != instance.title
+    instance._loaded_title = instance.title
+    tags = course_tags if created or deleted or moved_course_id or retitled else course_detail_tags
+    invalidate_tags(tags(course_id))
+    if moved_course_id:
+        invalidate_tags(course_tags(moved_course_id))
+    search.schedule_refresh([course_id, moved_course_id])
+    
+    # Adding, removing or moving a lesson to another course changes every enrollment's progress
+    if created or deleted or moved_course_id:
+        progress.schedule_course_recompute(course_id, moved_course_id)
+
+@receiver([post_save, post_delete], sender=Enrollment)
+def invalidate_enrollment_authorization(sender, instance, **kwargs):
+    invalidate_authorization(instance.user_id)
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, **kwargs):
+    if created:
+        stats.enrollment_added(instance.course_id)
+        progress.init_enrollment(instance)
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    stats.enrollment_removed(instance.course_id)
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._counted_as = (instance.__dict__.get('course_id'), instance.__dict__.get('rating'))
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    counted_as = (instance.course_id, instance.rating)
+    if created:
+        stats.review_added(*counted_as)
+    else:
+        stats.review_changed(instance._counted_as, counted_as)
+    instance._counted_as = counted_as
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    stats.review_removed(*instance._counted_as)
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Announcement)
+def feed_changed(sender, instance, **kwargs):
+    if _cascading(kwargs['signal'], instance.course_id):
+        return
+    versions.bump_feed_version(instance.course_id)
+
+@receiver(post_save, sender=Category)
+def category_changed(sender, instance, created, **kwargs):
+    categories.invalidate_category_tree()
+    if not created:
+        course_ids = list(instance.courses.values_list('pk', flat=True))
+        search.schedule_refresh(course_ids)
+        # Course pages render the category name; keep their ETags honest
+        versions.touch_courses(*course_ids)
+        # Moving a category changes which subtree its courses are listed under
+        invalidate_tags(['courses'] + category_tags(instance.pk))
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    categories.invalidate_category_tree()
+
+def _refresh_user_courses(user_id):
+    """Refresh the courses that render a user, as their instructor or as a reviewer."""
+    taught = list(Course.objects.filter(instructor_id=user_id).values_list('pk', flat=True))
+    reviewed = list(Review.objects.filter(user_id=user_id).order_by().values_list('course_id', flat=True).distinct())
+    
+    versions.touch_courses(*taught)
+    versions.bump_feed_version(*reviewed)
+    tags = [tag for course_id in set(taught) | set(reviewed) for tag in course_detail_tags(course_id)]
+    if taught:
+        # Course lists show the instructor too
+        tags.append('courses')
+    if tags:
+        invalidate_tags(tags)
+    return taught
+
+@receiver(post_save, sender=User)
+def instructor_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which is neither searchable nor rendered
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    search.schedule_refresh(_refresh_user_courses(instance.pk))
+
+@receiver(post_save, sender=UserProfile)
+def profile_changed(sender, instance, created, **kwargs):
+    if not created:
+        _refresh_user_courses(instance.user_id)
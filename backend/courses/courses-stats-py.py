@@ -0,0 +1,92 @@
+from django.db.models import Count, F, Q, Sum
+from .models import Course, Enrollment, Review
+
+RATINGS = range(1, 6)
+
+def _rating_field(rating):
+    if rating in RATINGS:
+        return f'rating_{rating}_count'
+    return None
+
+def _apply(course_id, deltas):
+    Course.objects.filter(pk=course_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+def enrollment_added(course_id):
+    _apply(course_id, {'enrollment_count': 1})
+
+def enrollment_removed(course_id):
+    _apply(course_id, {'enrollment_count': -1})
+
+def review_added(course_id, rating):
+    deltas = {'review_count': 1, 'rating_sum': rating}
+    if _rating_field(rating):
+        deltas[_rating_field(rating)] = 1
+    _apply(course_id, deltas)
+
+def review_removed(course_id, rating):
+    deltas = {'review_count': -1, 'rating_sum': -rating}
+    if _rating_field(rating):
+        deltas[_rating_field(rating)] = -1
+    _apply(course_id, deltas)
+
+def review_changed(old, new):
+    """Move a review's contribution from ``old`` to ``new`` (course_id, rating) pairs."""
+    if old == new:
+        return
+    
+    old_course_id, old_rating = old
+    new_course_id, new_rating = new
+    if old_course_id != new_course_id:
+        review_removed(old_course_id, old_rating)
+        review_added(new_course_id, new_rating)
+        return
+    
+    deltas = {'rating_sum': new_rating - old_rating}
+    if _rating_field(old_rating):
+        deltas[_rating_field(old_rating)] = -1
+    if _rating_field(new_rating):
+        deltas[_rating_field(new_rating)] = 1
+    _apply(new_course_id, deltas)
+
+def rebuild_course_stats(course_ids=None, chunk_size=1000):
+    """Recompute every counter from the Enrollment and Review tables."""
+    courses = Course.objects.order_by('pk')
+    if course_ids:
+        courses = courses.filter(pk__in=course_ids)
+    pks = list(courses.values_list('pk', flat=True))
+    
+    rating_counts = {
+        f'rating_{rating}_count': Count('id', filter=Q(rating=rating))
+        for rating in RATINGS
+    }
+    
+    rebuilt = 0
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        
+        enrollment_counts = dict(
+            Enrollment.objects.filter(course_id__in=chunk)
+            .values('course_id').annotate(n=Count('id'))
+            .values_list('course_id', 'n')
+        )
+        review_stats = {}
+        for row in (
+            Review.objects.filter(course_id__in=chunk)
+            .values('course_id')
+            .annotate(review_count=Count('id'), rating_sum=Sum('rating'), **rating_counts)
+        ):
+            review_stats[row.pop('course_id')] = row
+        
+        batch = []
+        for pk in chunk:
+            course = Course(pk=pk, enrollment_count=enrollment_counts.get(pk, 0))
+            for field, value in review_stats.get(pk, {}).items():
+                setattr(course, field, value or 0)
+            batch.append(course)
+        
+        Course.objects.bulk_update(batch, Course.COUNTER_FIELDS)
+        rebuilt += len(batch)
+    
+    return rebuilt
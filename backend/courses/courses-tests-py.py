@@ -0,0 +1,267 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, pre_delete
+from django.db.models.deletion import Collector
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from lms_project.compiled import compile_serializer
+from users.models import UserProfile
+from . import heartbeats, search, signals
+from .models import Category, Course, CourseSearchDocument, Section, Lesson, Enrollment, LessonProgress, Announcement, Review
+from .serializers import CourseListSerializer, EnrollmentSerializer, LessonProgressSerializer
+
+User = get_user_model()
+
+# Keep the response cache and authorization contexts off the shared Redis instance
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Upper bounds per action; the counts must also stay the same as the data grows
+QUERY_BUDGETS = {
+    'list': 3,
+    'retrieve': 8,
+    'my_courses': 2,
+    'enrollments': 3,
+}
+
+def make_user(username, user_type='student', profile=True):
+    user = User.objects.create_user(
+        username=username, email=f'{username}@example.com', password='password',
+        first_name=username.title(), user_type=user_type,
+    )
+    if profile:
+        UserProfile.objects.create(user=user, phone_number='555-0100')
+    return user
+
+def make_course(instructor, category, title):
+    return Course.objects.create(
+        title=title, description=f'About {title}', category=category,
+        instructor=instructor, price='49.99', is_published=True,
+    )
+
+def add_content(course, sections=1, lessons=1, reviews=1, announcements=1):
+    """Grow a course by the given number of rows of each kind."""
+    offset = course.sections.count()
+    for index in range(sections):
+        section = Section.objects.create(course=course, title=f'Section {offset + index}', order=offset + index)
+        for order in range(lessons):
+            Lesson.objects.create(section=section, title=f'Lesson {order}', order=order, duration=5)
+
+    offset = course.reviews.count()
+    for index in range(reviews):
+        reviewer = make_user(f'reviewer{course.pk}x{offset + index}', profile=index % 2 == 0)
+        Review.objects.create(course=course, user=reviewer, rating=index % 5 + 1, comment='Good')
+
+    for index in range(announcements):
+        Announcement.objects.create(course=course, title=f'News {index}', content='Update')
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryCountTests(APITestCase):
+    """The queries each course action runs, which must not grow with the data it renders."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = make_user('instructor', user_type='instructor')
+        cls.student = make_user('student')
+        cls.category = Category.objects.create(name='Programming')
+    
+    def count_queries(self, url, user):
+        # Clear the response cache and cached authorization so every request is built from the database
+        cache.clear()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+    
+    def assertConstantQueries(self, action, url, user, grow):
+        before = self.count_queries(url, user)
+        grow()
+        after = self.count_queries(url, user)
+        self.assertEqual(before, after, f'{action} ran {before} queries before growing the data and {after} after')
+        self.assertLessEqual(after, QUERY_BUDGETS[action], f'{action} ran {after} queries')
+    
+    def test_list(self):
+        make_course(self.instructor, self.category, 'First')
+        
+        def grow():
+            for index in range(10):
+                instructor = make_user(f'teacher{index}', user_type='instructor', profile=index % 2 == 0)
+                category = Category.objects.create(name=f'Topic {index}', parent=self.category)
+                add_content(make_course(instructor, category, f'Course {index}'), reviews=2)
+        
+        self.assertConstantQueries('list', '/api/courses/', self.student, grow)
+    
+    def test_retrieve(self):
+        course = make_course(self.instructor, self.category, 'Detail')
+        add_content(course)
+        
+        # A small course and one with 30 sections, 300 lessons, 40 reviews and 20 announcements
+        self.assertConstantQueries(
+            'retrieve', f'/api/courses/{course.pk}/', self.student,
+            lambda: add_content(course, sections=29, lessons=10, reviews=39, announcements=19),
+        )
+    
+    def test_my_courses(self):
+        Enrollment.objects.create(user=self.student, course=make_course(self.instructor, self.category, 'Enrolled'))
+        
+        def grow():
+            for index in range(10):
+                instructor = make_user(f'teacher{index}', user_type='instructor', profile=index % 2 == 0)
+                course = make_course(instructor, self.category, f'Course {index}')
+                Enrollment.objects.create(user=self.student, course=course)
+        
+        self.assertConstantQueries('my_courses', '/api/courses/enrollments/my_courses/', self.student, grow)
+    
+    def test_enrollments(self):
+        course = make_course(self.instructor, self.category, 'Popular')
+        Enrollment.objects.create(user=make_user('learner'), course=course)
+        
+        def grow():
+            for index in range(15):
+                Enrollment.objects.create(user=make_user(f'learner{index}', profile=index % 2 == 0), course=course)
+        
+        self.assertConstantQueries('enrollments', '/api/courses/enrollments/', self.instructor, grow)
+
+@override_settings(CACHES=TEST_CACHES)
+class CachedSearchTests(APITestCase):
+    """Cached ``?search=`` pages must follow the lesson titles they match on."""
+    
+    def search(self, term):
+        response = self.client.get('/api/courses/', {'search': term})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [course['id'] for course in response.json()['results']]
+    
+    def test_lesson_title_change(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            course = make_course(make_user('instructor', user_type='instructor'), Category.objects.create(name='Programming'), 'Algorithms')
+            section = Section.objects.create(course=course, title='Basics', order=0)
+            lesson = Lesson.objects.create(section=section, title='Recursion', order=0)
+        self.assertEqual(self.search('recursion'), [course.pk])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.title = 'Iteration'
+            lesson.save()
+        self.assertEqual(self.search('recursion'), [])
+        self.assertEqual(self.search('iteration'), [course.pk])
+
+@override_settings(CACHES=TEST_CACHES)
+class CompiledSerializerTests(APITestCase):
+    """Compiled list rendering must produce the same JSON bytes as the serializers it replaces."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_user('instructor', user_type='instructor')
+        category = Category.objects.create(name='Programming')
+        cls.courses = [make_course(instructor, category, 'Reviewed'), make_course(instructor, category, 'Unreviewed')]
+        cls.courses[0].thumbnail = 'course_thumbnails/reviewed.png'
+        cls.courses[0].save()
+        add_content(cls.courses[0], sections=2, lessons=2, reviews=3)
+        
+        for index, course in enumerate(cls.courses):
+            # With and without a profile, so missing reverse relations are covered
+            student = make_user(f'student{index}', profile=index == 0)
+            enrollment = Enrollment.objects.create(user=student, course=course)
+            for lesson in Lesson.objects.filter(section__course=course):
+                LessonProgress.objects.create(enrollment=enrollment, lesson=lesson, is_completed=lesson.order == 0)
+    
+    def assertIdentical(self, serializer_class, queryset):
+        request = Request(APIRequestFactory().get('/api/courses/'))
+        context = {'request': request}
+        compiled = compile_serializer(serializer_class, context)
+        self.assertIsNotNone(compiled, f'{serializer_class.__name__} did not compile')
+        
+        queryset = queryset.order_by('pk')
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_class(queryset, many=True, context=context).data)
+        actual = renderer.render(compiled.render_many(compiled.values(queryset)))
+        self.assertEqual(actual, expected)
+    
+    def test_course_list(self):
+        self.assertIdentical(CourseListSerializer, Course.objects.select_related('instructor__profile', 'category'))
+    
+    def test_enrollment(self):
+        self.assertIdentical(EnrollmentSerializer, Enrollment.objects.select_related(
+            'user__profile', 'course__instructor__profile', 'course__category'
+        ))
+    
+    def test_lesson_progress(self):
+        self.assertIdentical(LessonProgressSerializer, LessonProgress.objects.all())
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchDocumentTests(TestCase):
+    """Course deletes must not depend on the PostgreSQL-only search document table."""
+    
+    def setUp(self):
+        self.course = make_course(make_user('instructor', user_type='instructor'), Category.objects.create(name='Programming'), 'Doomed')
+        add_content(self.course)
+    
+    def test_delete_does_not_collect_documents(self):
+        collector = Collector(using=connection.alias)
+        collector.collect([self.course])
+        self.assertNotIn(CourseSearchDocument, collector.data)
+        self.assertFalse(any(qs.model is CourseSearchDocument for qs in collector.fast_deletes))
+    
+    def test_delete_course(self):
+        # On SQLite the document table does not exist; on PostgreSQL the document goes with the course
+        search.refresh_documents([self.course.pk])
+        self.course.delete()
+        self.assertFalse(Course.objects.filter(pk=self.course.pk).exists())
+        if search.use_postgres():
+            self.assertFalse(CourseSearchDocument.objects.filter(pk=self.course.pk).exists())
+
+class CascadeMarkTests(TestCase):
+    """A course delete that rolls back must not leave its rows skipping their bookkeeping."""
+    
+    def test_rolled_back_delete_is_forgotten(self):
+        course = make_course(make_user('instructor', user_type='instructor'), Category.objects.create(name='Programming'), 'Kept')
+        
+        def fail(sender, instance, **kwargs):
+            raise RuntimeError('statement timeout')
+        
+        pre_delete.connect(fail, sender=Course)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                course.delete()
+        finally:
+            pre_delete.disconnect(fail, sender=Course)
+        
+        self.assertTrue(Course.objects.filter(pk=course.pk).exists())
+        self.assertFalse(signals._cascading(post_delete, course.pk))
+
+@override_settings(CACHES=TEST_CACHES)
+class HeartbeatTests(APITestCase):
+    """Heartbeats take whatever the player sends and flush in bounded steps."""
+    
+    def setUp(self):
+        cache.clear()
+        self.student = make_user('student')
+        course = make_course(make_user('instructor', user_type='instructor'), Category.objects.create(name='Programming'), 'Video')
+        section = Section.objects.create(course=course, title='Basics', order=0)
+        self.lessons = [Lesson.objects.create(section=section, title=f'Lesson {order}', order=order) for order in range(5)]
+        self.enrollment = Enrollment.objects.create(user=self.student, course=course)
+    
+    def test_malformed_lesson_ids(self):
+        self.client.force_authenticate(self.student)
+        updates = [{'lesson': [self.lessons[0].pk]}, {'lesson': {'id': 1}}, {'lesson': True}, 'lesson', {'lesson': self.lessons[0].pk}]
+        response = self.client.post('/api/courses/lessons/heartbeat/', {'updates': updates}, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['buffered'], 1)
+        self.assertEqual([error['lesson'] for error in response.json()['errors']], [None] * 4)
+    
+    def test_inline_flush_is_capped(self):
+        updates = [(self.enrollment.pk, lesson.pk, 30, 30) for lesson in self.lessons]
+        with mock.patch.object(heartbeats, 'HEARTBEAT_FLUSH_BATCH', 2), mock.patch.object(heartbeats, 'HEARTBEAT_FLUSH_THRESHOLD', 1):
+            heartbeats.buffer_positions(updates)
+            self.assertEqual(cache.get(heartbeats.FLUSHED_KEY), 2)
+            self.assertTrue(heartbeats.flush_due())
+            
+            heartbeats.flush_positions()
+        self.assertEqual(cache.get(heartbeats.FLUSHED_KEY), 5)
+        self.assertEqual(LessonProgress.objects.filter(enrollment=self.enrollment, last_position=30).count(), 5)
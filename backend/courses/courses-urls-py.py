@@ -8,13 +8,14 @@ from .views import (
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
-router.register(r'', CourseViewSet, basename='course')
 router.register(r'sections', SectionViewSet)
 router.register(r'lessons', LessonViewSet)
 router.register(r'enrollments', EnrollmentViewSet)
 router.register(r'progress', LessonProgressViewSet)
 router.register(r'announcements', AnnouncementViewSet)
 router.register(r'reviews', ReviewViewSet)
+# Registered last so its catch-all detail route does not shadow the prefixes above
+router.register(r'', CourseViewSet, basename='course')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,25 @@
+from django.db.models import F
+from django.utils import timezone
+from .models import Course
+
+def _bump(field, course_ids):
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(**{
+            field: F(field) + 1,
+            'updated_at': timezone.now(),
+        })
+
+def touch_courses(*course_ids):
+    """Mark ``course_ids`` as changed when rows they render, such as their category, change."""
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+
+def bump_curriculum_version(*course_ids):
+    """Mark the sections and lessons of ``course_ids`` as changed."""
+    _bump('curriculum_version', course_ids)
+
+def bump_feed_version(*course_ids):
+    """Mark the reviews and announcements of ``course_ids`` as changed."""
+    _bump('feed_version', course_ids)
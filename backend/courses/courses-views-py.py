@@ -1,8 +1,14 @@
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import viewsets, permissions, filters, serializers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, Avg, Q
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from lms_project.cache import CachedResponseMixin, category_tags, course_detail_tags
+from lms_project.compiled import CompiledListMixin
+from lms_project.conditional import ConditionalGetMixin
+from lms_project.dynamic_fields import rendered_relations
+from lms_project.pagination import CursorOptInPagination
 from .models import (
     Category, Course, Section, Lesson, 
     Enrollment, LessonProgress, Announcement, Review
@@ -12,6 +18,14 @@ from .serializers import (
     SectionSerializer, LessonSerializer, EnrollmentSerializer, 
     LessonProgressSerializer, AnnouncementSerializer, ReviewSerializer
 )
+from .progress import record_lesson_progress
+from .search import CourseSearchFilter
+from .categories import get_category_tree, subtree_path
+from .gradebook import EXPORT_FORMATS, stream_gradebook
+from .cohorts import enroll_cohort, read_identifiers
+from .curriculum import get_learner_curriculum
+from . import heartbeats
+from .authz import get_authorization
 from .permissions import (
     IsInstructorOrReadOnly, IsEnrolledOrInstructor, 
     IsInstructorOrAdmin
@@ -23,31 +37,32 @@ class CategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsInstructorOrReadOnly]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        return Response(get_category_tree())
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, CachedResponseMixin, CompiledListMixin, viewsets.ModelViewSet):
     permission_classes = [IsInstructorOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description']
+    filter_backends = [CourseSearchFilter, filters.OrderingFilter]
     ordering_fields = ['created_at', 'title', 'price']
     
     def get_queryset(self):
-        queryset = Course.objects.annotate(
-            enrollment_count=Count('enrollments', distinct=True),
-            average_rating=Avg('reviews__rating')
-        )
+        queryset = Course.objects.all()
         
         # Filter by instructor
         instructor_id = self.request.query_params.get('instructor_id')
         if instructor_id:
             queryset = queryset.filter(instructor_id=instructor_id)
         
-        # Filter by category
+        # Filter by category, including every category below it
         category_id = self.request.query_params.get('category_id')
         if category_id:
-            queryset = queryset.filter(
-                Q(category_id=category_id) | 
-                Q(category__parent_id=category_id)
-            )
+            path = subtree_path(category_id) if category_id.isdigit() else None
+            if path:
+                queryset = queryset.filter(category__path__startswith=path)
+            else:
+                queryset = queryset.none()
         
         # Filter by price range
         min_price = self.request.query_params.get('min_price')
@@ -67,6 +82,18 @@ class CourseViewSet(viewsets.ModelViewSet):
                 Q(is_published=True)
             )
         
+        # Load exactly what the action's serializer walks, in a fixed number of queries,
+        # leaving out relations trimmed by ?fields= and ?expand=
+        if self.action in ['list', 'retrieve', 'update', 'partial_update']:
+            related = rendered_relations(self.request, ['instructor__profile', 'category'])
+            if related:
+                queryset = queryset.select_related(*related)
+        if self.action in ['retrieve', 'update', 'partial_update']:
+            # Reviews and announcements are capped and fetched by CourseDetailSerializer itself
+            queryset = queryset.prefetch_related(*rendered_relations(self.request, [
+                Prefetch('sections', queryset=Section.objects.prefetch_related('lessons')),
+            ]))
+        
         return queryset
     
     def get_serializer_class(self):
@@ -74,6 +101,33 @@ class CourseViewSet(viewsets.ModelViewSet):
             return CourseListSerializer
         return CourseDetailSerializer
     
+    def get_validators(self):
+        pk = self.kwargs.get('pk')
+        if self.action != 'retrieve' or not str(pk).isdigit():
+            return None
+        
+        # Visibility rules included, so unpublished courses stay 404 for others
+        state = self.get_queryset().prefetch_related(None).filter(pk=pk).values_list(
+            'updated_at', 'curriculum_version', 'feed_version', *Course.COUNTER_FIELDS
+        ).first()
+        if state is None:
+            return None
+        # Counters move without touching updated_at, so only the ETag covers them
+        return state, None
+    
+    def get_cache_tags(self):
+        if self.action != 'retrieve':
+            return ['courses']
+        
+        # Only writes to this course, its rows or its category drop its detail entry
+        pk = self.kwargs['pk']
+        tags = course_detail_tags(pk)
+        if str(pk).isdigit():
+            category_id = Course.objects.filter(pk=pk).values_list('category_id', flat=True).first()
+            if category_id is not None:
+                tags += category_tags(category_id)
+        return tags
+    
     def perform_create(self, serializer):
         serializer.save(instructor=self.request.user)
     
@@ -123,12 +177,88 @@ class CourseViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def curriculum(self, request, pk=None):
+        """Ordered sections and lessons from the cached snapshot, with the caller's completion merged in."""
+        course = self.get_object()
+        return Response(get_learner_curriculum(course, request.user))
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsInstructorOrAdmin])
+    def bulk_enroll(self, request, pk=None):
+        """Enroll a cohort given as a ``users`` list of ids or emails, or a CSV ``file`` upload."""
+        course = self.get_object()
+        
+        # Only the course instructor and admins can enroll other users
+        if not (request.user.is_staff or get_authorization(request).teaches(course.pk)):
+            return Response(
+                {'detail': 'You do not have permission to enroll users in this course.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                identifiers = read_identifiers(upload)
+            except UnicodeDecodeError:
+                return Response(
+                    {'detail': 'file must be a UTF-8 encoded CSV file.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            identifiers = request.data.get('users', [])
+            if not isinstance(identifiers, list) or not all(
+                isinstance(identifier, (int, str)) and not isinstance(identifier, bool)
+                for identifier in identifiers
+            ):
+                return Response(
+                    {'detail': 'users must be a list of user ids or emails.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        summary, results = enroll_cohort(course.pk, identifiers)
+        return Response({**summary, 'results': results})
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsInstructorOrAdmin])
+    def gradebook(self, request, pk=None):
+        course = self.get_object()
+        
+        # Only the course instructor and admins can export grades
+        if not (request.user.is_staff or get_authorization(request).teaches(course.pk)):
+            return Response(
+                {'detail': 'You do not have permission to export this gradebook.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # ?export=csv|jsonl; DRF reserves ?format= for renderer selection
+        export_format = request.query_params.get('export', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f'export must be one of: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        content_type, extension = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream_gradebook(course.pk, export_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="course-{course.pk}-gradebook.{extension}"'
+        return response
 
-class SectionViewSet(viewsets.ModelViewSet):
+class SectionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     permission_classes = [IsInstructorOrReadOnly]
     
+    def get_validators(self):
+        # Only a course's section list is covered by its curriculum version
+        course_id = self.request.query_params.get('course_id')
+        if self.action != 'list' or not course_id or not course_id.isdigit():
+            return None
+        
+        state = Course.objects.filter(pk=course_id).values_list('curriculum_version', 'updated_at').first()
+        if state is None:
+            return None
+        return state, state[1]
+    
     def get_queryset(self):
         course_id = self.request.query_params.get('course_id')
         if course_id:
@@ -141,10 +271,11 @@ class LessonViewSet(viewsets.ModelViewSet):
     permission_classes = [IsInstructorOrReadOnly]
     
     def get_queryset(self):
+        queryset = Lesson.objects.select_related('section')
         section_id = self.request.query_params.get('section_id')
         if section_id:
-            return Lesson.objects.filter(section_id=section_id)
-        return Lesson.objects.all()
+            return queryset.filter(section_id=section_id)
+        return queryset
             
     @action(detail=True, methods=['get'])
     def progress(self, request, pk=None):
@@ -152,11 +283,17 @@ class LessonViewSet(viewsets.ModelViewSet):
         user = request.user
         
         try:
-            enrollment = Enrollment.objects.get(user=user, course=lesson.section.course)
+            enrollment = Enrollment.objects.get(user=user, course_id=lesson.section.course_id)
             progress, created = LessonProgress.objects.get_or_create(
                 enrollment=enrollment,
                 lesson=lesson
             )
+            
+            # Show a heartbeat that is still waiting to be flushed
+            buffered = heartbeats.buffered_position(enrollment.pk, lesson.pk)
+            if buffered and buffered[4] > progress.viewed_at:
+                progress.last_position, progress.watched_duration, progress.viewed_at = buffered[2:]
+            
             serializer = LessonProgressSerializer(progress)
             return Response(serializer.data)
         except Enrollment.DoesNotExist:
@@ -171,56 +308,91 @@ class LessonViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Get data from request
-        is_completed = request.data.get('is_completed', False)
+        is_completed = serializers.BooleanField().to_internal_value(request.data.get('is_completed', False))
         last_position = request.data.get('last_position', 0)
         watched_duration = request.data.get('watched_duration', 0)
         
         try:
-            enrollment = Enrollment.objects.get(user=user, course=lesson.section.course)
-            progress, created = LessonProgress.objects.get_or_create(
-                enrollment=enrollment,
-                lesson=lesson,
-                defaults={
-                    'is_completed': is_completed,
-                    'last_position': last_position,
-                    'watched_duration': watched_duration
-                }
-            )
-            
-            if not created:
-                progress.is_completed = is_completed
-                progress.last_position = last_position
-                progress.watched_duration = watched_duration
-                progress.save()
-            
-            # Update course progress
-            self._update_course_progress(enrollment)
-            
-            serializer = LessonProgressSerializer(progress)
-            return Response(serializer.data)
-            
+            enrollment = Enrollment.objects.get(user=user, course_id=lesson.section.course_id)
         except Enrollment.DoesNotExist:
             return Response(
                 {'detail': 'You are not enrolled in this course.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        
+        heartbeats.discard_position(enrollment.pk, lesson.pk)
+        progress = record_lesson_progress(
+            enrollment.pk, lesson.pk, is_completed,
+            last_position=last_position, watched_duration=watched_duration
+        )
+        
+        serializer = LessonProgressSerializer(progress)
+        return Response(serializer.data)
     
-    def _update_course_progress(self, enrollment):
-        """Helper method to update course progress"""
-        total_lessons = Lesson.objects.filter(section__course=enrollment.course).count()
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).count()
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def heartbeat(self, request):
+        """
+        Accept many player position updates at once.
+        
+        Plain position updates are buffered and written in bulk; updates that
+        carry ``is_completed`` are written through immediately.
+        """
+        updates = request.data.get('updates', [])
+        if not isinstance(updates, list):
+            return Response(
+                {'detail': 'updates must be a list.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        enrollment.progress = (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0
+        # Lesson ids come straight from the body; anything but an integer matches no lesson
+        lesson_ids = []
+        for update in updates:
+            lesson_id = update.get('lesson') if isinstance(update, dict) else None
+            lesson_ids.append(lesson_id if type(lesson_id) is int else None)
         
-        # Check if course is completed
-        if enrollment.progress >= 100:
-            enrollment.status = 'completed'
-            enrollment.completed_at = timezone.now()
+        lesson_courses = dict(
+            Lesson.objects.filter(pk__in={i for i in lesson_ids if i is not None})
+            .values_list('pk', 'section__course_id')
+        )
+        enrollment_ids = dict(
+            Enrollment.objects.filter(user=request.user, course_id__in=set(lesson_courses.values()))
+            .values_list('course_id', 'pk')
+        )
         
-        enrollment.save()
+        buffered = []
+        written = 0
+        errors = []
+        for update, lesson_id in zip(updates, lesson_ids):
+            enrollment_id = enrollment_ids.get(lesson_courses.get(lesson_id))
+            if enrollment_id is None:
+                errors.append({'lesson': lesson_id, 'detail': 'You are not enrolled in this course.'})
+                continue
+            
+            try:
+                last_position = int(update.get('last_position', 0))
+                watched_duration = int(update.get('watched_duration', 0))
+                is_completed = update.get('is_completed')
+                if is_completed is not None:
+                    is_completed = serializers.BooleanField().to_internal_value(is_completed)
+            except (TypeError, ValueError, serializers.ValidationError):
+                errors.append({'lesson': lesson_id, 'detail': 'Invalid progress values.'})
+                continue
+            
+            if is_completed is None:
+                buffered.append((enrollment_id, lesson_id, last_position, watched_duration))
+            else:
+                heartbeats.discard_position(enrollment_id, lesson_id)
+                record_lesson_progress(
+                    enrollment_id, lesson_id, is_completed,
+                    last_position=last_position, watched_duration=watched_duration
+                )
+                written += 1
+        
+        heartbeats.buffer_positions(buffered)
+        return Response(
+            {'buffered': len(buffered), 'written': written, 'errors': errors},
+            status=status.HTTP_202_ACCEPTED
+        )
     
     @action(detail=True, methods=['post'])
     def mark_complete(self, request, pk=None):
@@ -228,68 +400,58 @@ class LessonViewSet(viewsets.ModelViewSet):
         user = request.user
         
         try:
-            enrollment = Enrollment.objects.get(user=user, course=lesson.section.course)
+            enrollment = Enrollment.objects.get(user=user, course_id=lesson.section.course_id)
         except Enrollment.DoesNotExist:
             return Response(
                 {'detail': 'You are not enrolled in this course.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        lesson_progress, created = LessonProgress.objects.get_or_create(
-            enrollment=enrollment,
-            lesson=lesson,
-            defaults={'is_completed': True, 'last_position': request.data.get('last_position', 0), 'watched_duration': request.data.get('watched_duration', 0)}
+        heartbeats.discard_position(enrollment.pk, lesson.pk)
+        lesson_progress = record_lesson_progress(
+            enrollment.pk, lesson.pk, True,
+            last_position=request.data.get('last_position'),
+            watched_duration=request.data.get('watched_duration')
         )
         
-        if not created:
-            lesson_progress.is_completed = True
-            lesson_progress.last_position = request.data.get('last_position', lesson_progress.last_position)
-            lesson_progress.watched_duration = request.data.get('watched_duration', lesson_progress.watched_duration)
-            lesson_progress.save()
-        
-        # Update course progress
-        total_lessons = Lesson.objects.filter(section__course=lesson.section.course).count()
-        completed_lessons = LessonProgress.objects.filter(
-            enrollment=enrollment,
-            is_completed=True
-        ).count()
-        
-        enrollment.progress = (completed_lessons / total_lessons) * 100 if total_lessons > 0 else 0
-        
-        # Check if course is completed
-        if enrollment.progress >= 100:
-            enrollment.status = 'completed'
-            enrollment.completed_at = timezone.now()
-        
-        enrollment.save()
-        
         serializer = LessonProgressSerializer(lesson_progress)
         return Response(serializer.data)
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
+class EnrollmentViewSet(CompiledListMixin, viewsets.ModelViewSet):
+    pagination_class = CursorOptInPagination
+    cursor_ordering = ('enrolled_at', 'id')
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def _with_related(self, queryset):
+        # Everything EnrollmentSerializer embeds, joined into the one query
+        related = rendered_relations(self.request, [
+            'user__profile', 'course__instructor__profile', 'course__category'
+        ])
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+    
     def get_queryset(self):
         user = self.request.user
         
         # Students can see only their enrollments
         if user.user_type == 'student':
-            return Enrollment.objects.filter(user=user)
+            return self._with_related(Enrollment.objects.filter(user=user))
         
         # Instructors can see enrollments for their courses
         elif user.user_type == 'instructor':
-            return Enrollment.objects.filter(course__instructor=user)
+            return self._with_related(Enrollment.objects.filter(course__instructor=user))
         
         # Admins can see all enrollments
-        return Enrollment.objects.all()
+        return self._with_related(Enrollment.objects.all())
     
     @action(detail=False, methods=['get'])
     def my_courses(self, request):
-        enrollments = Enrollment.objects.filter(
+        enrollments = self._with_related(Enrollment.objects.filter(
             user=request.user,
             status='active'
-        )
+        ))
         serializer = self.get_serializer(enrollments, many=True)
         return Response(serializer.data)
     
@@ -310,7 +472,9 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(enrollment)
         return Response(serializer.data)
 
-class LessonProgressViewSet(viewsets.ModelViewSet):
+class LessonProgressViewSet(CompiledListMixin, viewsets.ModelViewSet):
+    pagination_class = CursorOptInPagination
+    cursor_ordering = ('id',)
     serializer_class = LessonProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -334,6 +498,8 @@ class LessonProgressViewSet(viewsets.ModelViewSet):
         return LessonProgress.objects.all()
 
 class AnnouncementViewSet(viewsets.ModelViewSet):
+    pagination_class = CursorOptInPagination
+    cursor_ordering = ('-created_at', '-id')
     queryset = Announcement.objects.all()
     serializer_class = AnnouncementSerializer
     permission_classes = [IsInstructorOrReadOnly]
@@ -354,20 +520,27 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 class ReviewViewSet(viewsets.ModelViewSet):
+    pagination_class = CursorOptInPagination
+    cursor_ordering = ('-created_at', '-id')
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
+        queryset = Review.objects.all()
+        related = rendered_relations(self.request, ['user__profile'])
+        if related:
+            queryset = queryset.select_related(*related)
+        
         course_id = self.request.query_params.get('course_id')
         if course_id:
-            return Review.objects.filter(course_id=course_id)
+            return queryset.filter(course_id=course_id)
         
         user_id = self.request.query_params.get('user_id')
         if user_id:
-            return Review.objects.filter(user_id=user_id)
+            return queryset.filter(user_id=user_id)
         
-        return Review.objects.all()
+        return queryset
     
     def perform_create(self, serializer):
         course_id = self.request.data.get('course_id')
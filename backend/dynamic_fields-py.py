@@ -0,0 +1,142 @@
+from rest_framework import permissions, serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(value):
+    """
+    Parse ``a,b.c,b.d`` into ``{'a': None, 'b': {'c': None, 'd': None}}``.
+
+    ``None`` stands for the whole field; naming a field outright wins over
+    naming some of its nested fields.
+    """
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.') if part.strip()]
+        node = tree
+        for depth, part in enumerate(parts):
+            if depth == len(parts) - 1:
+                node[part] = None
+            elif part in node and node[part] is None:
+                break
+            else:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSpec:
+    """
+    The fields and expanded relations a response asks for, from ``?fields=`` and ``?expand=``.
+
+    ``fields`` and ``expand`` are path trees from ``parse_paths``, or ``None``
+    when the parameter is absent: every field is rendered and every nested
+    relation stays expanded, as without this feature.
+    """
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        if self.expand is None or name in self.expand:
+            return True
+        # Asking for some of a relation's fields implies expanding it
+        return bool(self.fields and self.fields.get(name))
+
+    def child(self, name):
+        fields = None if self.fields is None else self.fields.get(name)
+        expand = None if self.expand is None else (self.expand.get(name) or {})
+        return FieldSpec(fields, expand)
+
+    def rendered_prefix(self, lookup):
+        """The leading part of an ORM ``a__b__c`` lookup whose relations are rendered expanded."""
+        spec = self
+        rendered = []
+        for name in lookup.split('__'):
+            if not (spec.includes(name) and spec.expands(name)):
+                break
+            rendered.append(name)
+            spec = spec.child(name)
+        return '__'.join(rendered)
+
+
+def get_field_spec(request):
+    """Parse the caller's field selection once per request; only reads are ever trimmed."""
+    spec = getattr(request, '_field_spec', None)
+    if spec is None:
+        params = request.query_params if request.method in permissions.SAFE_METHODS else {}
+        fields = params.get(FIELDS_PARAM)
+        expand = params.get(EXPAND_PARAM)
+        spec = FieldSpec(
+            parse_paths(fields) if fields is not None else None,
+            parse_paths(expand) if expand is not None else None,
+        )
+        request._field_spec = spec
+    return spec
+
+
+def rendered_relations(request, lookups):
+    """
+    Keep the ``select_related``/``prefetch_related`` lookups the response renders.
+
+    Lookups are ORM paths such as ``'course__instructor__profile'``, cut
+    short where the response stops expanding, or ``Prefetch`` objects, kept
+    only if rendered in full. Relation names must match serializer field names.
+    """
+    spec = get_field_spec(request)
+    rendered = []
+    for lookup in lookups:
+        if isinstance(lookup, str):
+            lookup = spec.rendered_prefix(lookup)
+        elif spec.rendered_prefix(lookup.prefetch_to) != lookup.prefetch_to:
+            continue
+        if lookup and lookup not in rendered:
+            rendered.append(lookup)
+    return rendered
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin honouring ``?fields=`` and ``?expand=``.
+
+    Dotted paths reach nested serializers, e.g. ``?fields=id,course.title``.
+    Once ``?expand=`` is given, nested relations it does not name collapse to
+    their primary key, or are left out for to-many relations, so they cost no
+    query at all.
+    """
+
+    def _field_spec(self):
+        request = self.context.get('request')
+        if request is None:
+            return FieldSpec()
+
+        path = []
+        node = self
+        while node.parent is not None:
+            # The child of a many=True list serializer is bound without a name
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+
+        spec = get_field_spec(request)
+        for name in reversed(path):
+            spec = spec.child(name)
+        return spec
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self._field_spec()
+
+        for name, field in list(fields.items()):
+            if not spec.includes(name):
+                del fields[name]
+            elif isinstance(field, serializers.BaseSerializer) and not spec.expands(name):
+                if isinstance(field, serializers.ListSerializer):
+                    del fields[name]
+                else:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+        return fields
@@ -0,0 +1,35 @@
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class CursorOptInPagination(BasePagination):
+    """
+    Page-number pagination that clients can switch to keyset pagination.
+
+    ``?pagination=cursor`` (or following a ``cursor`` link) returns cursor
+    pages ordered by the view's ``cursor_ordering``, which avoids OFFSET scans
+    and skips the ``COUNT(*)`` that page numbers need.
+    """
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = CursorPagination()
+            self.paginator.ordering = view.cursor_ordering
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return PageNumberPagination().get_schema_operation_parameters(view)
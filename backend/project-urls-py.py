@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from lms_project.cache import ResponseCacheStatsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +12,7 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/courses/', include('courses.urls')),
     path('api/quizzes/', include('quizzes.urls')),
+    path('api/cache-stats/', ResponseCacheStatsView.as_view(), name='cache_stats'),
 ]
 
 if settings.DEBUG:
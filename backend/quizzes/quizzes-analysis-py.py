@@ -0,0 +1,160 @@
+from itertools import islice
+
+import numpy as np
+from django.core.cache import cache
+from .models import Question, Choice, QuizAttempt, QuestionResponse
+from .scoring import get_attempts_version
+
+ANALYSIS_CACHE_TIMEOUT = 60 * 60 * 24
+STREAM_CHUNK_SIZE = 20000
+SCORE_BINS = 10
+
+def _stream_columns(queryset, dtypes):
+    """Read ``values_list`` rows through a server-side cursor into one NumPy array per column."""
+    columns = [[] for _ in dtypes]
+    rows = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, STREAM_CHUNK_SIZE))
+        if not chunk:
+            break
+        for index, dtype in enumerate(dtypes):
+            columns[index].append(np.fromiter((row[index] for row in chunk), dtype=dtype, count=len(chunk)))
+    return [
+        np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+        for parts, dtype in zip(columns, dtypes)
+    ]
+
+def _nan_to_none(values):
+    return [None if np.isnan(value) else float(value) for value in values]
+
+def _point_biserial(correct, rest):
+    """Column-wise Pearson correlation between item correctness and the rest-of-test score."""
+    correct = correct - correct.mean(axis=0)
+    rest = rest - rest.mean(axis=0)
+    denominator = np.sqrt((correct ** 2).sum(axis=0) * (rest ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, (correct * rest).sum(axis=0) / denominator, np.nan)
+
+def _cronbach_alpha(points, totals):
+    items = points.shape[1]
+    if items < 2 or points.shape[0] < 2:
+        return None
+    total_variance = totals.var(ddof=1)
+    if total_variance == 0:
+        return None
+    item_variance = points.var(axis=0, ddof=1).sum()
+    return float(items / (items - 1) * (1 - item_variance / total_variance))
+
+def analyse_quiz(quiz_id):
+    """Item analysis over every completed attempt of a quiz."""
+    questions = list(Question.objects.filter(quiz_id=quiz_id).values_list('id', 'question_text', 'points'))
+    choices = list(
+        Choice.objects.filter(question__quiz_id=quiz_id)
+        .order_by('question_id', 'order', 'id')
+        .values_list('id', 'question_id', 'choice_text', 'is_correct')
+    )
+    attempt_ids, scores, passed = _stream_columns(
+        QuizAttempt.objects.filter(quiz_id=quiz_id, completed_at__isnull=False)
+        .order_by('id').values_list('id', 'score', 'passed'),
+        [np.int64, np.float64, np.bool_],
+    )
+
+    result = {
+        'quiz': quiz_id,
+        'attempt_count': int(attempt_ids.size),
+        'reliability': {'cronbach_alpha': None},
+        'score_distribution': None,
+        'questions': [],
+    }
+    if attempt_ids.size == 0 or not questions:
+        return result
+
+    question_ids = np.array(sorted(question[0] for question in questions), dtype=np.int64)
+    choice_ids = np.array(sorted(choice[0] for choice in choices), dtype=np.int64)
+
+    # Scatter responses into attempt x question matrices
+    response_attempts, response_questions, response_correct, response_points = _stream_columns(
+        QuestionResponse.objects.filter(attempt__quiz_id=quiz_id, attempt__completed_at__isnull=False)
+        .order_by().values_list('attempt_id', 'question_id', 'is_correct', 'points_earned'),
+        [np.int64, np.int64, np.bool_, np.float64],
+    )
+    # Drop responses to questions since moved to another quiz, and to attempts completed after the scan above
+    known = np.isin(response_questions, question_ids) & np.isin(response_attempts, attempt_ids)
+    rows = np.searchsorted(attempt_ids, response_attempts[known])
+    cols = np.searchsorted(question_ids, response_questions[known])
+    shape = (attempt_ids.size, question_ids.size)
+    answered = np.zeros(shape, dtype=np.bool_)
+    correct = np.zeros(shape, dtype=np.float32)
+    points = np.zeros(shape, dtype=np.float32)
+    answered[rows, cols] = True
+    correct[rows, cols] = response_correct[known]
+    points[rows, cols] = response_points[known]
+
+    Through = QuestionResponse.selected_choices.through
+    (selected_choices,) = _stream_columns(
+        Through.objects.filter(
+            questionresponse__attempt__quiz_id=quiz_id,
+            questionresponse__attempt__completed_at__isnull=False,
+        ).order_by().values_list('choice_id'),
+        [np.int64],
+    )
+    selected_choices = selected_choices[np.isin(selected_choices, choice_ids)]
+    selection_counts = np.bincount(np.searchsorted(choice_ids, selected_choices), minlength=choice_ids.size)
+
+    answered_counts = answered.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        difficulty = np.where(answered_counts > 0, correct.sum(axis=0) / answered_counts, np.nan)
+    totals = points.sum(axis=1)
+    discrimination = _point_biserial(correct, totals[:, None] - points)
+
+    column = {question_id: index for index, question_id in enumerate(question_ids.tolist())}
+    choice_index = {choice_id: index for index, choice_id in enumerate(choice_ids.tolist())}
+    question_choices = {}
+    for choice_id, question_id, choice_text, is_correct in choices:
+        count = int(selection_counts[choice_index[choice_id]])
+        answered_count = int(answered_counts[column[question_id]])
+        question_choices.setdefault(question_id, []).append({
+            'id': choice_id,
+            'choice_text': choice_text,
+            'is_correct': is_correct,
+            'selection_count': count,
+            'selection_rate': count / answered_count if answered_count else None,
+        })
+
+    difficulty = _nan_to_none(difficulty)
+    discrimination = _nan_to_none(discrimination)
+    for question_id, question_text, question_points in questions:
+        index = column[question_id]
+        result['questions'].append({
+            'id': question_id,
+            'question_text': question_text,
+            'points': question_points,
+            'response_count': int(answered_counts[index]),
+            'difficulty': difficulty[index],
+            'discrimination': discrimination[index],
+            'choices': question_choices.get(question_id, []),
+        })
+
+    counts, edges = np.histogram(scores, bins=SCORE_BINS, range=(0, 100))
+    result['score_distribution'] = {
+        'mean': float(scores.mean()),
+        'median': float(np.median(scores)),
+        'std': float(scores.std()),
+        'pass_rate': float(passed.mean()),
+        'bins': [
+            {'min': float(low), 'max': float(high), 'count': int(count)}
+            for low, high, count in zip(edges[:-1], edges[1:], counts)
+        ],
+    }
+    result['reliability']['cronbach_alpha'] = _cronbach_alpha(points, totals)
+    return result
+
+def get_quiz_analysis(quiz):
+    """Cached ``analyse_quiz`` result, recomputed after new attempts or question bank edits."""
+    version = get_attempts_version(quiz.pk)
+    cache_key = f'quiz:{quiz.pk}:analysis:{quiz.answer_key_version}:{version}'
+    result = cache.get(cache_key)
+    if result is None:
+        result = analyse_quiz(quiz.pk)
+        cache.set(cache_key, result, ANALYSIS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,90 @@
+import csv
+import io
+
+from django.db import transaction
+from .models import Quiz, Question, Choice
+
+CSV_COLUMNS = ['question_order', 'question_text', 'question_type', 'points', 'choice_text', 'is_correct']
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+def create_quiz(quiz_data, questions_data):
+    """
+    Create a quiz with its whole question bank in one transaction.
+
+    ``questions_data`` holds validated question dicts with a ``choices`` list
+    each. Questions and choices are written with one ``bulk_create`` apiece, so
+    the question and choice signals do not run; a brand new quiz has no cached
+    answer key for them to invalidate.
+    """
+    with transaction.atomic():
+        quiz = Quiz.objects.create(**quiz_data)
+        questions = Question.objects.bulk_create([
+            Question(
+                quiz=quiz,
+                question_text=question_data['question_text'],
+                question_type=question_data['question_type'],
+                points=question_data.get('points', 1),
+                order=question_data.get('order', position),
+            )
+            for position, question_data in enumerate(questions_data)
+        ])
+        Choice.objects.bulk_create([
+            Choice(
+                question=question,
+                choice_text=choice_data['choice_text'],
+                is_correct=choice_data.get('is_correct', False),
+                order=choice_data.get('order', position),
+            )
+            for question, question_data in zip(questions, questions_data)
+            for position, choice_data in enumerate(question_data.get('choices', []))
+        ])
+    return quiz
+
+def parse_quiz_csv(upload):
+    """
+    Read questions from a CSV file with one row per choice.
+
+    Consecutive rows with the same ``question_order`` and ``question_text``
+    belong to one question; a row without ``choice_text`` adds no choice.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig'))
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f'CSV file is missing columns: {", ".join(sorted(missing))}.')
+
+    questions = []
+    current = None
+    for row in reader:
+        key = (row['question_order'], row['question_text'])
+        if current is None or current[0] != key:
+            question = {
+                'question_text': row['question_text'],
+                'question_type': row['question_type'],
+                'points': row['points'] or 1,
+                'order': row['question_order'] or len(questions),
+                'choices': [],
+            }
+            questions.append(question)
+            current = (key, question)
+        if row['choice_text']:
+            current[1]['choices'].append({
+                'choice_text': row['choice_text'],
+                'is_correct': (row['is_correct'] or '').strip().lower() in TRUE_VALUES,
+            })
+    return questions
+
+def export_quiz_csv(quiz_id):
+    """One CSV row per choice, in the format ``parse_quiz_csv`` reads."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_COLUMNS)
+
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by(
+        'order', 'pk', 'choices__order', 'choices__pk'
+    ).values_list('order', 'question_text', 'question_type', 'points', 'choices__choice_text', 'choices__is_correct')
+    for order, question_text, question_type, points, choice_text, is_correct in rows:
+        writer.writerow([
+            order, question_text, question_type, points,
+            choice_text or '', '' if choice_text is None else str(is_correct).lower(),
+        ])
+    return output.getvalue()
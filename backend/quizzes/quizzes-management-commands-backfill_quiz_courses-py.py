@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from quizzes.ownership import backfill_quiz_courses
+
+class Command(BaseCommand):
+    help = 'Backfill the denormalized course reference on quizzes and quiz attempts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+    
+    def handle(self, *args, **options):
+        updated = backfill_quiz_courses(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled course for {updated} quiz attempts.'))
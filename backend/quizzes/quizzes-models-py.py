@@ -11,10 +11,28 @@ class Quiz(models.Model):
     max_attempts = models.IntegerField(default=0, help_text="0 for unlimited attempts")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped whenever a question or choice changes, see quizzes.scoring
+    answer_key_version = models.PositiveIntegerField(default=1, editable=False)
+    # Course of the lesson this quiz is attached to, kept in sync by courses.signals
+    course = models.ForeignKey(
+        'courses.Course', blank=True, null=True, on_delete=models.SET_NULL,
+        related_name='quizzes', editable=False
+    )
+    
+    # Maintained with in-place updates that a full save must never overwrite
+    DENORMALIZED_FIELDS = ('answer_key_version', 'course')
     
     class Meta:
         verbose_name_plural = "Quizzes"
     
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.title
 
@@ -53,6 +71,11 @@ class Choice(models.Model):
 class QuizAttempt(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_attempts')
+    # Copied from the quiz so instructor listings need no join chain
+    course = models.ForeignKey(
+        'courses.Course', blank=True, null=True, on_delete=models.SET_NULL,
+        related_name='quiz_attempts', editable=False
+    )
     score = models.FloatField(default=0.0)
     passed = models.BooleanField(default=False)
     time_spent = models.IntegerField(default=0, help_text="Time spent in seconds")
@@ -61,6 +84,10 @@ class QuizAttempt(models.Model):
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at', '-id']),
+            models.Index(fields=['course', '-started_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.quiz.title} - {self.score}"
@@ -0,0 +1,22 @@
+from django.db.models import OuterRef, Subquery
+from .models import Quiz, QuizAttempt
+
+def assign_quiz_course(quiz_id, course_id):
+    """Point a quiz and all of its attempts at ``course_id``."""
+    Quiz.objects.filter(pk=quiz_id).update(course_id=course_id)
+    QuizAttempt.objects.filter(quiz_id=quiz_id).exclude(course_id=course_id).update(course_id=course_id)
+
+def backfill_quiz_courses(chunk_size=10000):
+    """Fill ``course`` on every quiz and attempt from the lesson each quiz is attached to."""
+    from courses.models import Lesson
+    
+    Quiz.objects.update(course_id=Subquery(
+        Lesson.objects.filter(quiz_id=OuterRef('pk')).values('section__course_id')[:1]
+    ))
+    
+    quiz_course = Subquery(Quiz.objects.filter(pk=OuterRef('quiz_id')).values('course_id')[:1])
+    pks = list(QuizAttempt.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        QuizAttempt.objects.filter(pk__gte=chunk[0], pk__lte=chunk[-1]).update(course_id=quiz_course)
+    return len(pks)
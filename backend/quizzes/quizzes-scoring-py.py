@@ -0,0 +1,199 @@
+import time
+from collections import namedtuple
+from functools import lru_cache
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Quiz, Question, QuizAttempt, QuestionResponse
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+
+QuestionKey = namedtuple(
+    'QuestionKey',
+    ['points', 'question_type', 'choice_ids', 'correct_choice_ids', 'correct_answers']
+)
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_answer_key(quiz_id):
+    """Load every question of a quiz with its choices in a single query."""
+    rows = Question.objects.filter(quiz_id=quiz_id).order_by().values_list(
+        'id', 'question_type', 'points',
+        'choices__id', 'choices__is_correct', 'choices__choice_text'
+    )
+
+    questions = {}
+    for question_id, question_type, points, choice_id, is_correct, choice_text in rows:
+        if question_id not in questions:
+            questions[question_id] = (points, question_type, set(), set(), [])
+        _, _, choice_ids, correct_choice_ids, correct_answers = questions[question_id]
+
+        # Questions without choices come back with a single all-NULL choice row
+        if choice_id is None:
+            continue
+        choice_ids.add(choice_id)
+        if is_correct:
+            correct_choice_ids.add(choice_id)
+            correct_answers.append(choice_text.lower().strip())
+
+    return {
+        question_id: QuestionKey(
+            points, question_type, frozenset(choice_ids),
+            frozenset(correct_choice_ids), tuple(correct_answers)
+        )
+        for question_id, (points, question_type, choice_ids, correct_choice_ids, correct_answers)
+        in questions.items()
+    }
+
+@lru_cache(maxsize=256)
+def _compiled_answer_key(quiz_id, version):
+    cache_key = f'quiz:{quiz_id}:answer-key:{version}'
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = load_answer_key(quiz_id)
+        cache.set(cache_key, answer_key, ANSWER_KEY_TIMEOUT)
+    return answer_key
+
+def get_answer_key(quiz):
+    """
+    Return the compiled answer key for ``quiz``.
+    
+    Keys are cached per ``answer_key_version`` in-process and in the shared
+    cache, so scoring only reads the question bank after it changes.
+    """
+    return _compiled_answer_key(quiz.pk, quiz.answer_key_version)
+
+def bump_answer_key_version(quiz_id):
+    Quiz.objects.filter(pk=quiz_id).update(
+        answer_key_version=F('answer_key_version') + 1,
+        updated_at=timezone.now(),
+    )
+
+def _attempts_version_key(quiz_id):
+    return f'quiz:{quiz_id}:attempts-version'
+
+def _fresh_attempts_version():
+    # Seed from the clock so an evicted version never points back at an old report
+    return int(time.time() * 1000)
+
+def get_attempts_version(quiz_id):
+    key = _attempts_version_key(quiz_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_attempts_version(), None)
+        version = cache.get(key)
+    return version
+
+def bump_attempts_version(quiz_id):
+    """Mark attempt-derived reports of ``quiz_id`` stale once the transaction commits."""
+    def bump():
+        try:
+            cache.incr(_attempts_version_key(quiz_id))
+        except ValueError:
+            cache.add(_attempts_version_key(quiz_id), _fresh_attempts_version(), None)
+    transaction.on_commit(bump)
+
+def _is_correct(question, selected_choice_ids, text_response):
+    if question.question_type in ['multiple_choice', 'true_false']:
+        # All correct choices must be selected and no incorrect ones
+        try:
+            return question.correct_choice_ids == set(selected_choice_ids)
+        except TypeError:
+            return False
+
+    if question.question_type == 'short_answer':
+        # Exact match against any correct choice text
+        return (text_response or '').lower().strip() in question.correct_answers
+
+    return False
+
+def score_responses(answer_key, responses_data):
+    """
+    Score submitted responses in memory.
+
+    Returns ``(earned_points, total_points, scored)`` where ``scored`` holds
+    ``(question_id, text_response, choice_ids, is_correct, points_earned)`` for
+    each response to a question of this quiz, in submission order. Only answered
+    questions count towards the total, as before.
+    """
+    earned_points = 0
+    total_points = 0
+    scored = []
+
+    for response_data in responses_data:
+        if not isinstance(response_data, dict):
+            continue
+
+        question_id = _as_id(response_data.get('question'))
+        question = answer_key.get(question_id)
+        if question is None:
+            continue
+
+        selected_choice_ids = response_data.get('selected_choices', [])
+        if not isinstance(selected_choice_ids, list):
+            selected_choice_ids = []
+        text_response = response_data.get('text_response', '')
+
+        # Only choices belonging to the question are recorded
+        choice_ids = []
+        for raw_id in selected_choice_ids:
+            choice_id = _as_id(raw_id)
+            if choice_id in question.choice_ids and choice_id not in choice_ids:
+                choice_ids.append(choice_id)
+
+        is_correct = _is_correct(question, selected_choice_ids, text_response)
+        points_earned = question.points if is_correct else 0.0
+
+        total_points += question.points
+        earned_points += points_earned
+        scored.append((question_id, text_response, choice_ids, is_correct, points_earned))
+
+    return earned_points, total_points, scored
+
+def submit_attempt(attempt_id, responses_data):
+    """
+    Score and persist a quiz attempt in one transaction.
+
+    Returns the completed attempt, or ``None`` if it had already been submitted.
+    """
+    with transaction.atomic():
+        # Lock only the attempt; locking the quiz row would serialize every submission
+        attempt = QuizAttempt.objects.select_for_update(of=('self',)).select_related('quiz').get(pk=attempt_id)
+        if attempt.completed_at is not None:
+            return None
+
+        answer_key = get_answer_key(attempt.quiz)
+        earned_points, total_points, scored = score_responses(answer_key, responses_data)
+
+        responses = QuestionResponse.objects.bulk_create([
+            QuestionResponse(
+                attempt=attempt,
+                question_id=question_id,
+                text_response=text_response,
+                is_correct=is_correct,
+                points_earned=points_earned,
+            )
+            for question_id, text_response, _, is_correct, points_earned in scored
+        ])
+
+        Through = QuestionResponse.selected_choices.through
+        Through.objects.bulk_create([
+            Through(questionresponse_id=response.pk, choice_id=choice_id)
+            for response, (_, _, choice_ids, _, _) in zip(responses, scored)
+            for choice_id in choice_ids
+        ])
+
+        attempt.completed_at = timezone.now()
+        attempt.time_spent = int((attempt.completed_at - attempt.started_at).total_seconds())
+        if total_points > 0:
+            attempt.score = (earned_points / total_points) * 100
+        attempt.passed = attempt.score >= attempt.quiz.pass_percentage
+        attempt.save(update_fields=['completed_at', 'time_spent', 'score', 'passed'])
+        bump_attempts_version(attempt.quiz_id)
+
+    return attempt
@@ -1,20 +1,22 @@
 from rest_framework import serializers
+from lms_project.dynamic_fields import DynamicFieldsMixin
 from .models import Quiz, Question, Choice, QuizAttempt, QuestionResponse
+from .authoring import create_quiz
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Choice
         fields = ['id', 'question', 'choice_text', 'is_correct', 'order']
         extra_kwargs = {'is_correct': {'write_only': True}}
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     choices = ChoiceSerializer(many=True, read_only=True)
     
     class Meta:
         model = Question
         fields = ['id', 'quiz', 'question_text', 'question_type', 'points', 'order', 'choices']
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
     question_count = serializers.SerializerMethodField()
     total_points = serializers.SerializerMethodField()
@@ -28,19 +30,56 @@ class QuizSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
     
+    # QuizViewSet annotates both; fall back for freshly created or updated quizzes
     def get_question_count(self, obj):
+        if hasattr(obj, 'question_count'):
+            return obj.question_count
         return obj.questions.count()
     
     def get_total_points(self, obj):
+        if hasattr(obj, 'total_points'):
+            return obj.total_points
         return sum(question.points for question in obj.questions.all())
 
-class QuestionResponseSerializer(serializers.ModelSerializer):
+class QuizSummarySerializer(QuizSerializer):
+    class Meta(QuizSerializer.Meta):
+        fields = [
+            'id', 'title', 'description', 'time_limit', 'pass_percentage',
+            'max_attempts', 'created_at', 'updated_at',
+            'question_count', 'total_points'
+        ]
+
+class ChoiceImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Choice
+        fields = ['choice_text', 'is_correct', 'order']
+
+class QuestionImportSerializer(serializers.ModelSerializer):
+    choices = ChoiceImportSerializer(many=True, required=False)
+    
+    class Meta:
+        model = Question
+        fields = ['question_text', 'question_type', 'points', 'order', 'choices']
+
+class QuizImportSerializer(serializers.ModelSerializer):
+    """A quiz with its full question bank, answers included, for import and export."""
+    questions = QuestionImportSerializer(many=True)
+    
+    class Meta:
+        model = Quiz
+        fields = ['title', 'description', 'time_limit', 'pass_percentage', 'max_attempts', 'questions']
+    
+    def create(self, validated_data):
+        questions_data = validated_data.pop('questions')
+        return create_quiz(validated_data, questions_data)
+
+class QuestionResponseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = QuestionResponse
         fields = ['id', 'attempt', 'question', 'selected_choices', 'text_response', 'is_correct', 'points_earned']
         read_only_fields = ['is_correct', 'points_earned']
 
-class QuizAttemptSerializer(serializers.ModelSerializer):
+class QuizAttemptSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     responses = QuestionResponseSerializer(many=True, read_only=True)
     
     class Meta:
@@ -51,7 +90,7 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['score', 'passed', 'started_at']
 
-class QuizResultSerializer(serializers.ModelSerializer):
+class QuizResultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
         fields = [
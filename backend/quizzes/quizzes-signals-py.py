@@ -0,0 +1,31 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import Question, Choice
+from .scoring import bump_answer_key_version
+
+@receiver(post_init, sender=Question)
+def remember_question_quiz(sender, instance, **kwargs):
+    instance._loaded_quiz_id = instance.__dict__.get('quiz_id')
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_answer_key_version(instance.quiz_id)
+    
+    # A question moved to another quiz changes both answer keys
+    if instance._loaded_quiz_id not in (None, instance.quiz_id):
+        bump_answer_key_version(instance._loaded_quiz_id)
+    instance._loaded_quiz_id = instance.quiz_id
+
+@receiver(post_init, sender=Choice)
+def remember_choice_question(sender, instance, **kwargs):
+    instance._loaded_question_id = instance.__dict__.get('question_id')
+
+@receiver([post_save, post_delete], sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    question_ids = {instance.question_id, instance._loaded_question_id} - {None}
+    quiz_ids = set(
+        Question.objects.filter(pk__in=question_ids).values_list('quiz_id', flat=True)
+    )
+    for quiz_id in quiz_ids:
+        bump_answer_key_version(quiz_id)
+    instance._loaded_question_id = instance.question_id
@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from lms_project.compiled import compile_serializer
+from .models import Quiz, Question, Choice, QuizAttempt, QuestionResponse
+from .scoring import submit_attempt
+from .serializers import QuizResultSerializer
+
+User = get_user_model()
+
+# Keep cached answer keys off the shared Redis instance
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+def legacy_submit(attempt, responses_data):
+    """The per-response scoring ``QuizAttemptViewSet.submit`` ran before quizzes.scoring, kept as the reference."""
+    attempt.completed_at = timezone.now()
+    attempt.time_spent = int((attempt.completed_at - attempt.started_at).total_seconds())
+    total_points = 0
+    earned_points = 0
+
+    for response_data in responses_data:
+        question_id = response_data.get('question')
+        selected_choice_ids = response_data.get('selected_choices', [])
+        text_response = response_data.get('text_response', '')
+
+        try:
+            question = Question.objects.get(id=question_id, quiz=attempt.quiz)
+            total_points += question.points
+            response = QuestionResponse.objects.create(attempt=attempt, question=question, text_response=text_response)
+
+            for choice_id in selected_choice_ids:
+                try:
+                    response.selected_choices.add(Choice.objects.get(id=choice_id, question=question))
+                except Choice.DoesNotExist:
+                    pass
+
+            is_correct = False
+            if question.question_type in ['multiple_choice', 'true_false']:
+                correct_choices = set(Choice.objects.filter(question=question, is_correct=True).values_list('id', flat=True))
+                is_correct = correct_choices == set(selected_choice_ids)
+            elif question.question_type == 'short_answer':
+                correct_answers = [
+                    choice.choice_text.lower().strip()
+                    for choice in Choice.objects.filter(question=question, is_correct=True)
+                ]
+                is_correct = text_response.lower().strip() in correct_answers
+
+            response.is_correct = is_correct
+            if is_correct:
+                response.points_earned = question.points
+                earned_points += question.points
+            response.save()
+        except Question.DoesNotExist:
+            continue
+
+    if total_points > 0:
+        attempt.score = (earned_points / total_points) * 100
+    attempt.passed = attempt.score >= attempt.quiz.pass_percentage
+    attempt.save()
+    return attempt
+
+def stored_result(attempt):
+    attempt.refresh_from_db()
+    responses = [
+        (
+            response.question_id, response.text_response, response.is_correct, response.points_earned,
+            sorted(response.selected_choices.values_list('pk', flat=True)),
+        )
+        for response in attempt.responses.order_by('pk')
+    ]
+    return attempt.score, attempt.passed, responses
+
+@override_settings(CACHES=TEST_CACHES)
+class ScoringTests(TestCase):
+    """quizzes.scoring must score exactly like the per-response code it replaced."""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user(username='student', email='student@example.com', password='password')
+        cls.quiz = Quiz.objects.create(title='Geography', pass_percentage=70.0)
+        
+        cls.multiple = Question.objects.create(quiz=cls.quiz, question_text='Pick both', question_type='multiple_choice', points=2)
+        cls.first = Choice.objects.create(question=cls.multiple, choice_text='First', is_correct=True)
+        cls.second = Choice.objects.create(question=cls.multiple, choice_text='Second', is_correct=True)
+        cls.wrong = Choice.objects.create(question=cls.multiple, choice_text='Wrong')
+        
+        cls.true_false = Question.objects.create(quiz=cls.quiz, question_text='True?', question_type='true_false', points=1)
+        cls.true = Choice.objects.create(question=cls.true_false, choice_text='True', is_correct=True)
+        cls.false = Choice.objects.create(question=cls.true_false, choice_text='False')
+        
+        cls.short = Question.objects.create(quiz=cls.quiz, question_text='Capital?', question_type='short_answer', points=3)
+        Choice.objects.create(question=cls.short, choice_text=' Paris ', is_correct=True)
+        Choice.objects.create(question=cls.short, choice_text='Lyon')
+        
+        cls.matching = Question.objects.create(quiz=cls.quiz, question_text='Match', question_type='matching', points=1)
+        
+        other_quiz = Quiz.objects.create(title='Other')
+        cls.foreign = Question.objects.create(quiz=other_quiz, question_text='Elsewhere', question_type='true_false')
+        cls.foreign_choice = Choice.objects.create(question=cls.foreign, choice_text='True', is_correct=True)
+    
+    def submissions(self):
+        return {
+            'all correct': [
+                {'question': self.multiple.pk, 'selected_choices': [self.first.pk, self.second.pk]},
+                {'question': self.true_false.pk, 'selected_choices': [self.true.pk]},
+                {'question': self.short.pk, 'text_response': 'paris'},
+                {'question': self.matching.pk},
+            ],
+            'partly correct': [
+                {'question': self.multiple.pk, 'selected_choices': [self.first.pk]},
+                {'question': self.true_false.pk, 'selected_choices': [self.false.pk]},
+                {'question': self.short.pk, 'text_response': '  PARIS  '},
+            ],
+            'choices of other questions': [
+                {'question': self.multiple.pk, 'selected_choices': [self.first.pk, self.second.pk, self.true.pk]},
+                {'question': self.true_false.pk, 'selected_choices': [self.foreign_choice.pk]},
+            ],
+            'repeated choices': [
+                {'question': self.multiple.pk, 'selected_choices': [self.first.pk, self.second.pk, self.first.pk]},
+            ],
+            'choice ids as strings': [
+                {'question': self.multiple.pk, 'selected_choices': [str(self.first.pk), str(self.second.pk)]},
+            ],
+            'unanswered and foreign questions': [
+                {'question': self.true_false.pk, 'selected_choices': [self.true.pk]},
+                {'question': self.foreign.pk, 'selected_choices': [self.foreign_choice.pk]},
+            ],
+            'wrong short answer': [
+                {'question': self.short.pk, 'text_response': 'Lyon'},
+                {'question': self.multiple.pk, 'selected_choices': []},
+            ],
+            'nothing submitted': [],
+        }
+    
+    def test_matches_legacy_scoring(self):
+        for name, responses in self.submissions().items():
+            with self.subTest(name):
+                expected = legacy_submit(QuizAttempt.objects.create(quiz=self.quiz, user=self.student), responses)
+                actual = submit_attempt(QuizAttempt.objects.create(quiz=self.quiz, user=self.student).pk, responses)
+                self.assertEqual(stored_result(actual), stored_result(expected))
+    
+    def test_second_submission_is_refused(self):
+        attempt = QuizAttempt.objects.create(quiz=self.quiz, user=self.student)
+        self.assertIsNotNone(submit_attempt(attempt.pk, []))
+        self.assertIsNone(submit_attempt(attempt.pk, []))
+    
+    def test_query_count_does_not_depend_on_questions(self):
+        def count_queries(responses):
+            attempt = QuizAttempt.objects.create(quiz=self.quiz, user=self.student)
+            with CaptureQueriesContext(connection) as queries:
+                submit_attempt(attempt.pk, responses)
+            return len(queries)
+        
+        responses = self.submissions()['all correct']
+        # Load the answer key first so both runs read it from the cache
+        count_queries(responses)
+        self.assertEqual(count_queries(responses[:1]), count_queries(responses))
+
+@override_settings(CACHES=TEST_CACHES)
+class CompiledSerializerTests(TestCase):
+    """Compiled attempt rendering must produce the same JSON bytes as QuizResultSerializer."""
+    
+    def test_quiz_result(self):
+        student = User.objects.create_user(username='student', email='student@example.com', password='password')
+        quiz = Quiz.objects.create(title='Geography')
+        QuizAttempt.objects.create(quiz=quiz, user=student)
+        submit_attempt(QuizAttempt.objects.create(quiz=quiz, user=student).pk, [])
+        
+        compiled = compile_serializer(QuizResultSerializer)
+        self.assertIsNotNone(compiled)
+        
+        attempts = QuizAttempt.objects.order_by('pk')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(compiled.render_many(compiled.values(attempts))),
+            renderer.render(QuizResultSerializer(attempts, many=True).data),
+        )
@@ -1,20 +1,67 @@
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Count, Prefetch, Sum
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse
 from .models import Quiz, Question, Choice, QuizAttempt, QuestionResponse
 from .serializers import (
-    QuizSerializer, QuestionSerializer, ChoiceSerializer,
+    QuizSerializer, QuizSummarySerializer, QuizImportSerializer, QuestionSerializer, ChoiceSerializer,
     QuizAttemptSerializer, QuestionResponseSerializer, QuizResultSerializer
 )
-from courses.permissions import IsInstructorOrReadOnly, IsEnrolledOrInstructor
+from lms_project.pagination import CursorOptInPagination
+from lms_project.compiled import compile_serializer
+from lms_project.conditional import ConditionalGetMixin
+from lms_project.dynamic_fields import rendered_relations
+from courses.authz import get_authorization
+from courses.permissions import IsInstructorOrReadOnly, IsEnrolledOrInstructor, IsInstructorOrAdmin
+from .scoring import submit_attempt
+from .authoring import export_quiz_csv, parse_quiz_csv
 
-class QuizViewSet(viewsets.ModelViewSet):
+class QuizViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [IsInstructorOrReadOnly]
     
+    def get_validators(self):
+        pk = self.kwargs.get('pk')
+        if self.action != 'retrieve' or not str(pk).isdigit():
+            return None
+        
+        # Question and choice changes bump answer_key_version and updated_at together
+        state = Quiz.objects.filter(pk=pk).values_list('updated_at', 'answer_key_version').first()
+        if state is None:
+            return None
+        return state, state[0]
+    
+    def _is_summary(self):
+        # ?summary=true lists quizzes without their question bank
+        return self.action == 'list' and self.request.query_params.get('summary') in ['true', '1']
+    
+    def get_queryset(self):
+        queryset = Quiz.objects.all()
+        if self.action not in ['list', 'retrieve']:
+            return queryset
+        
+        queryset = queryset.annotate(
+            question_count=Count('questions'),
+            total_points=Coalesce(Sum('questions__points'), 0),
+        )
+        if self._is_summary():
+            return queryset
+        
+        return queryset.prefetch_related(*rendered_relations(self.request, [Prefetch(
+            'questions',
+            queryset=Question.objects.prefetch_related(
+                Prefetch('choices', queryset=Choice.objects.order_by('order'))
+            )
+        )]))
+    
+    def get_serializer_class(self):
+        if self._is_summary():
+            return QuizSummarySerializer
+        return QuizSerializer
+    
     @action(detail=True, methods=['post'], permission_classes=[IsEnrolledOrInstructor])
     def start(self, request, pk=None):
         quiz = self.get_object()
@@ -43,7 +90,8 @@ class QuizViewSet(viewsets.ModelViewSet):
         # Create new attempt
         attempt = QuizAttempt.objects.create(
             quiz=quiz,
-            user=user
+            user=user,
+            course_id=quiz.course_id
         )
         
         serializer = QuizAttemptSerializer(attempt)
@@ -57,8 +105,87 @@ class QuizViewSet(viewsets.ModelViewSet):
             user=request.user
         )
         
+        compiled = compile_serializer(QuizResultSerializer)
+        if compiled is not None:
+            return Response(compiled.render_many(compiled.values(attempts)))
+        
         serializer = QuizResultSerializer(attempts, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def item_analysis(self, request, pk=None):
+        quiz = self.get_object()
+        
+        # Only the course instructor and admins can see item statistics
+        if not (request.user.is_staff or get_authorization(request).teaches(quiz.course_id)):
+            return Response(
+                {'detail': 'You do not have permission to view this analysis.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # NumPy is optional and only loaded here, so the rest of the API runs without it
+        try:
+            from .analysis import get_quiz_analysis
+        except ImportError:
+            return Response(
+                {'detail': 'Item analysis requires NumPy, which is not installed.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        return Response(get_quiz_analysis(quiz))
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_quiz(self, request):
+        """Create a quiz with all its questions and choices from one JSON body or CSV ``file`` upload."""
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                questions = parse_quiz_csv(upload)
+            except (UnicodeDecodeError, ValueError) as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            data = {
+                field: request.data[field] for field in QuizImportSerializer.Meta.fields
+                if field != 'questions' and field in request.data
+            }
+            data['questions'] = questions
+        else:
+            data = request.data
+        
+        serializer = QuizImportSerializer(data=data)
+        if serializer.is_valid():
+            quiz = serializer.save()
+            return Response(
+                {'id': quiz.pk, 'title': quiz.title, 'question_count': len(serializer.validated_data['questions'])},
+                status=status.HTTP_201_CREATED
+            )
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsInstructorOrAdmin])
+    def export(self, request, pk=None):
+        quiz = self.get_object()
+        
+        # Exports include the answers; a quiz not attached to a course has no owner to check, so only staff get it
+        if not (request.user.is_staff or (quiz.course_id is not None and get_authorization(request).teaches(quiz.course_id))):
+            return Response(
+                {'detail': 'You do not have permission to export this quiz.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # ?export=json|csv; DRF reserves ?format= for renderer selection
+        if request.query_params.get('export') == 'csv':
+            response = HttpResponse(export_quiz_csv(quiz.pk), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="quiz-{quiz.pk}.csv"'
+            return response
+        
+        quiz = Quiz.objects.prefetch_related(Prefetch(
+            'questions',
+            queryset=Question.objects.order_by('order', 'pk').prefetch_related(
+                Prefetch('choices', queryset=Choice.objects.order_by('order', 'pk'))
+            )
+        )).get(pk=quiz.pk)
+        return Response(QuizImportSerializer(quiz).data)
 
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
@@ -83,6 +210,8 @@ class ChoiceViewSet(viewsets.ModelViewSet):
         return Choice.objects.all()
 
 class QuizAttemptViewSet(viewsets.ModelViewSet):
+    pagination_class = CursorOptInPagination
+    cursor_ordering = ('-started_at', '-id')
     serializer_class = QuizAttemptSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -93,10 +222,10 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
         if user.user_type == 'student':
             return QuizAttempt.objects.filter(user=user)
         
-        # Instructors can see attempts for their quizzes
-        # This assumes Quiz has a foreign key to Course which has instructor
+        # Instructors can see attempts for quizzes in the courses they teach
         elif user.user_type == 'instructor':
-            return QuizAttempt.objects.filter(quiz__lesson__section__course__instructor=user)
+            taught_course_ids = get_authorization(self.request).taught_course_ids
+            return QuizAttempt.objects.filter(course_id__in=taught_course_ids)
         
         # Admins can see all attempts
         return QuizAttempt.objects.all()
@@ -106,7 +235,7 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
         attempt = self.get_object()
         
         # Check if attempt belongs to user
-        if attempt.user != request.user:
+        if attempt.user_id != request.user.id:
             return Response(
                 {'detail': 'You do not have permission to submit this attempt.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -119,81 +248,13 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Process responses
-        responses_data = request.data.get('responses', [])
-        
-        # Mark attempt as completed
-        attempt.completed_at = timezone.now()
-        
-        # Calculate time spent
-        time_spent = (attempt.completed_at - attempt.started_at).total_seconds()
-        attempt.time_spent = int(time_spent)
-        
-        # Process each response
-        total_points = 0
-        earned_points = 0
-        
-        for response_data in responses_data:
-            question_id = response_data.get('question')
-            selected_choice_ids = response_data.get('selected_choices', [])
-            text_response = response_data.get('text_response', '')
-            
-            try:
-                question = Question.objects.get(id=question_id, quiz=attempt.quiz)
-                total_points += question.points
-                
-                # Create response object
-                response = QuestionResponse.objects.create(
-                    attempt=attempt,
-                    question=question,
-                    text_response=text_response
-                )
-                
-                # Add selected choices
-                for choice_id in selected_choice_ids:
-                    try:
-                        choice = Choice.objects.get(id=choice_id, question=question)
-                        response.selected_choices.add(choice)
-                    except Choice.DoesNotExist:
-                        pass
-                
-                # Score the response
-                is_correct = False
-                
-                if question.question_type in ['multiple_choice', 'true_false']:
-                    # For these types, all correct choices must be selected and no incorrect ones
-                    correct_choices = set(Choice.objects.filter(question=question, is_correct=True).values_list('id', flat=True))
-                    selected_choices = set(selected_choice_ids)
-                    
-                    is_correct = correct_choices == selected_choices
-                
-                elif question.question_type == 'short_answer':
-                    # For short answer, use exact match for now
-                    # This could be enhanced with more sophisticated matching
-                    correct_answers = [
-                        choice.choice_text.lower().strip()
-                        for choice in Choice.objects.filter(question=question, is_correct=True)
-                    ]
-                    is_correct = text_response.lower().strip() in correct_answers
-                
-                # Update response with score
-                response.is_correct = is_correct
-                if is_correct:
-                    response.points_earned = question.points
-                    earned_points += question.points
-                
-                response.save()
-                
-            except Question.DoesNotExist:
-                continue
-        
-        # Calculate final score
-        if total_points > 0:
-            attempt.score = (earned_points / total_points) * 100
-        
-        # Determine if passed
-        attempt.passed = attempt.score >= attempt.quiz.pass_percentage
-        attempt.save()
+        # Score all responses in memory and write them in bulk
+        attempt = submit_attempt(attempt.pk, request.data.get('responses', []))
+        if attempt is None:
+            return Response(
+                {'detail': 'This quiz attempt has already been submitted.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         # Return result
         serializer = QuizResultSerializer(attempt)
@@ -209,10 +270,9 @@ class QuestionResponseViewSet(viewsets.ReadOnlyModelViewSet):
             attempt = QuizAttempt.objects.get(id=attempt_id)
             
             # Check if user has permission to view
-            if (self.request.user == attempt.user or 
+            if (self.request.user.pk == attempt.user_id or 
                 self.request.user.is_staff or 
-                (hasattr(attempt.quiz, 'lesson') and 
-                 attempt.quiz.lesson.section.course.instructor == self.request.user)):
+                get_authorization(self.request).teaches(attempt.course_id)):
                 return QuestionResponse.objects.filter(attempt=attempt)
             
             return QuestionResponse.objects.none()
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'lms_project.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,8 +41,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    # Custom middleware for caching
-    'lms_project.middleware.CacheMiddleware',
 ]
 
 ROOT_URLCONF = 'lms_project.urls'
@@ -81,6 +80,26 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    }
+}
+
+# Per-scope API response cache, invalidated through model signals (see lms_project.cache)
+RESPONSE_CACHE_TIMEOUT = 60 * 15
+RESPONSE_CACHE_STALE_TIMEOUT = 60
+RESPONSE_CACHE_JITTER = 0.1
+RESPONSE_CACHE_COALESCE_WAIT = 2.0
+
+# Responses at least this large are compressed with brotli or gzip (see lms_project.compression)
+COMPRESSION_MIN_SIZE = 1024
+
+# Video heartbeats are buffered in the cache and flushed in bulk (see courses.heartbeats)
+HEARTBEAT_FLUSH_THRESHOLD = 500
+HEARTBEAT_FLUSH_INTERVAL = 60
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',},
@@ -111,6 +130,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'lms_project.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'lms_project.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
@@ -0,0 +1,43 @@
+from django.db import transaction
+
+
+class _Batch:
+    def __init__(self, func):
+        self.func = func
+        self.items = set()
+
+    def __call__(self):
+        self.func(self.items)
+
+
+def is_pending(func):
+    """Whether ``func`` is still waiting on ``on_commit``; rolling back discards it, as committing runs it."""
+    connection = transaction.get_connection()
+    return any(callback[1] is func for callback in connection.run_on_commit)
+
+
+def on_commit_once(name, items, func):
+    """
+    Call ``func(items)`` once after the current transaction commits.
+
+    ``items`` from every call made under the same ``name`` during one
+    transaction are merged, so signal handlers firing once per row, e.g. for
+    every lesson a cascade deletes, schedule a single call between them.
+    Outside a transaction ``func`` runs right away, as ``on_commit`` would.
+    """
+    items = {item for item in items if item is not None}
+    if not items:
+        return
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        func(items)
+        return
+
+    batches = connection.__dict__.setdefault('_on_commit_batches', {})
+    batch = batches.get(name)
+    # Committing or rolling back drops the callback, and with it the batch
+    if batch is None or not is_pending(batch):
+        batch = batches[name] = _Batch(func)
+        transaction.on_commit(batch)
+    batch.items |= items
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 class User(AbstractUser):
@@ -18,6 +19,12 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive email lookups, e.g. courses.cohorts.resolve_users
+            models.Index(Lower('email'), name='users_user_email_lower_idx'),
+        ]
+    
     def __str__(self):
         return self.email
 
@@ -1,15 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from lms_project.dynamic_fields import DynamicFieldsMixin
 from .models import UserProfile
 
 User = get_user_model()
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = UserProfile
         fields = ['phone_number', 'address', 'date_of_birth']
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(required=False)
     
     class Meta: